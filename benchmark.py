@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import random
+import time
+import tracemalloc
+
+from intcode import BACKENDS, IntcodeComputer
+
+#######################
+#### INTCODE BENCH ####
+#######################
+
+# benchmark every intcode backend against the same synthetic programs
+#
+# run as follows:
+#   python benchmark.py                  # run everything, compare against the stored baseline
+#   python benchmark.py --save           # run everything, and store the results as the new baseline
+#   python benchmark.py --scale 0.1      # smaller programs, for a quick check
+#
+# for every program and every engine, report
+#   instructions per second (best of --repeat runs)
+#   peak memory allocated during a run (from tracemalloc, in a separate run, since it slows things down)
+#   the change in instructions per second since the baseline, if there is one
+
+BASELINE = 'benchmark_baseline.json'
+
+#################
+#### ENGINES ####
+#################
+
+# every engine is a function taking the program and a list of inputs, returning the outputs
+# there is one engine per backend of IntcodeComputer, and a typed memory version of each
+def makeEngine(backend, typed=False):
+    def engine(code, inputs):
+        computer = IntcodeComputer(code, inputs=inputs, storeOutputs=True, backend=backend, typed=typed)
+        computer.run()
+        return computer.drain()
+    return engine
+
+ENGINES = {backend: makeEngine(backend) for backend in BACKENDS}
+ENGINES.update({backend + '-typed': makeEngine(backend, typed=True) for backend in BACKENDS})
+
+##################
+#### PROGRAMS ####
+##################
+
+# every program is a function of a size n, returning the program and its inputs
+# data cells go right after the code; the programs are small enough to lay out by hand
+
+# n add / multiply instructions in a row, no loops
+# cells D+0 (always 1) and D+1 (always 1) feed D+2 (counts up) and D+3 (copies it)
+def straightLine(n):
+    D    = 4*n + 1
+    code = []
+    for i in range(n):
+        if i % 2 == 0:
+            code += [1, D+1, D+2, D+2]
+        else:
+            code += [2, D+2, D+0, D+3]
+    return code + [99, 1, 1, 0, 0], []
+
+# sum = n + (n-1) + ... + 1, in a three instruction loop; output the sum
+def arithmeticLoop(n):
+    code = [
+        1101, n, 0, 22,     #  0: i = n
+        1101, 0, 0, 23,     #  4: sum = 0
+        1, 23, 22, 23,      #  8: sum += i
+        1001, 22, -1, 22,   # 12: i -= 1
+        1005, 22, 8,        # 16: loop while i != 0
+        4, 23,              # 19: output sum
+        99,                 # 21
+        0, 0,               # 22: i, sum
+    ]
+    return code, []
+
+# a chain of m jumps, scattered through the program in random order, run n times over; output 0
+def jumpChain(n, m=100):
+    order = list(range(m))
+    random.Random(0).shuffle(order)
+
+    start = 7
+    tail  = start + 3*m
+    C     = tail + 12
+    slots = [start + 3*j for j in order]
+
+    code = [1101, n, 0, C, 1105, 1, slots[0]] + [0] * (3*m)
+    for j, slot in enumerate(slots):
+        target = slots[j+1] if j+1 < m else tail
+        code[slot:slot+3] = [1105, 1, target]
+    code += [
+        1001, C, -1, C,     # tail + 0: counter -= 1
+        1005, C, slots[0],  # tail + 4: go round again while counter != 0
+        4, C,               # tail + 7: output counter
+        99,                 # tail + 9
+        0, 0,               # padding
+        0,                  # C
+    ]
+    return code, []
+
+# walk the relative base through n cells, setting each to one more than the one before; output n
+def relativeBase(n):
+    C    = 22
+    B    = 23
+    code = [
+        109, B,             #  0: rb = B
+        1101, n, 0, C,      #  2: counter = n
+        21201, 0, 1, 1,     #  6: mem[rb+1] = mem[rb] + 1
+        109, 1,             # 10: rb += 1
+        1001, C, -1, C,     # 12: counter -= 1
+        1005, C, 6,         # 16: loop while counter != 0
+        204, 0,             # 19: output mem[rb]
+        99,                 # 21
+        0,                  # 22: counter
+        0,                  # 23: B, the start of the walk
+    ]
+    return code, []
+
+# read n inputs and output each one straight back
+def echo(n):
+    code = [
+        3, 12,              #  0: read into x
+        4, 12,              #  2: output x
+        1001, 13, -1, 13,   #  4: counter -= 1
+        1005, 13, 0,        #  8: loop while counter != 0
+        99,                 # 11
+        0,                  # 12: x
+        n,                  # 13: counter
+    ]
+    return code, list(range(n))
+
+# write to n addresses, stride apart, starting far beyond the program; output 0
+def sparseWrites(n, stride=10**6):
+    C    = 22
+    code = [
+        109, 10**9,         #  0: rb = 10**9
+        1101, n, 0, C,      #  2: counter = n
+        21101, 7, 0, 0,     #  6: mem[rb] = 7
+        109, stride,        # 10: rb += stride
+        1001, C, -1, C,     # 12: counter -= 1
+        1005, C, 6,         # 16: loop while counter != 0
+        4, C,               # 19: output counter
+        99,                 # 21
+        0,                  # 22: counter
+    ]
+    return code, []
+
+# name: (program, default size)
+PROGRAMS = {
+    'straight-line'  : (straightLine  , 20000 ),
+    'arithmetic-loop': (arithmeticLoop, 100000),
+    'jump-chain'     : (jumpChain     , 2000  ),
+    'relative-base'  : (relativeBase  , 50000 ),
+    'echo'           : (echo          , 50000 ),
+    'sparse-writes'  : (sparseWrites  , 1000  ),
+}
+
+#############
+#### RUN ####
+#############
+
+# count the instructions a program executes, with the profiler
+def countInstructions(code, inputs):
+    computer = IntcodeComputer(code, inputs=inputs, storeOutputs=True)
+    computer.setProfiling()
+    computer.run()
+    return computer.profiler.instructions
+
+# time one engine on one program, best of repeat; then measure its peak memory once
+def measure(engine, code, inputs, repeat):
+    best = float('inf')
+    for i in range(repeat):
+        start   = time.perf_counter()
+        outputs = engine(code, inputs)
+        best    = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    engine(code, inputs)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak, outputs
+
+# run every program on every engine
+# returns {program: {engine: {'ips', 'seconds', 'peak', 'instructions'}}}
+# engines that disagree with the reference backend about the outputs are reported as mismatches
+def runSuite(programs, engines, scale=1., repeat=3):
+    results = {}
+    for name in programs:
+        program, size = PROGRAMS[name]
+        code, inputs = program(max(1, int(size * scale)))
+        instructions = countInstructions(code, inputs)
+        reference    = ENGINES['reference'](code, inputs[:])
+
+        results[name] = {}
+        for engineName in engines:
+            engine = ENGINES[engineName]
+            seconds, peak, outputs = measure(engine, code, inputs[:], repeat)
+            results[name][engineName] = {
+                'instructions': instructions,
+                'seconds'     : seconds,
+                'ips'         : instructions / seconds if seconds > 0 else 0.,
+                'peak'        : peak,
+                'mismatch'    : outputs != reference,
+            }
+    return results
+
+# text report, with the change in instructions per second against the baseline where there is one
+def report(results, baseline):
+    lines = ['{:16s} {:16s} {:>12s} {:>14s} {:>12s} {:>9s}'.format(
+        'Program', 'Engine', 'Instructions', 'Instr/s', 'Peak (KiB)', 'Delta')]
+    for name, engines in results.items():
+        for engineName, r in engines.items():
+            old = baseline.get(name, {}).get(engineName)
+            delta = '{:+8.1f}%'.format(100 * (r['ips'] / old['ips'] - 1)) if old and old['ips'] > 0 else '       --'
+            lines.append('{:16s} {:16s} {:12d} {:14.0f} {:12.1f} {:>9s}{}'.format(
+                name, engineName, r['instructions'], r['ips'], r['peak'] / 1024, delta,
+                '  OUTPUT MISMATCH' if r['mismatch'] else '',
+            ))
+    return '\n'.join(lines)
+
+####
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark the intcode backends')
+    parser.add_argument('--programs', nargs='+', default=list(PROGRAMS), choices=list(PROGRAMS))
+    parser.add_argument('--engines' , nargs='+', default=list(ENGINES) , choices=list(ENGINES))
+    parser.add_argument('--scale'   , type=float, default=1., help='multiply every program size by this')
+    parser.add_argument('--repeat'  , type=int  , default=3 , help='time the best of this many runs')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline file to compare against')
+    parser.add_argument('--save'    , action='store_true', help='store these results as the baseline')
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = runSuite(args.programs, args.engines, args.scale, args.repeat)
+    print(report(results, baseline))
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
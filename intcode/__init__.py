@@ -0,0 +1,25 @@
+# the intcode computer, shared by every intcode puzzle
+#
+# run as follows:
+#   from intcode import IntcodeComputer, loadProgram
+#   computer = IntcodeComputer(loadProgram('input9.txt'), inputs=[1], storeOutputs=True)
+#   computer.run()
+#   computer.drain()
+#
+# see computer.py for everything a computer can do, and for the backends that run it
+# BatchIntcodeComputer needs numpy, so it isn't imported here; use
+#   from intcode.batch import BatchIntcodeComputer
+
+from .checkpoint import loadCheckpoint, saveCheckpoint
+from .computer import IntcodeComputer, BACKENDS, DEFAULT_BACKEND, HALTED, WAITING, BUDGET
+from .handlers import NPARAM
+from .loader import loadProgram, parseProgram
+from .memory import PagedMemory
+from .network import AmplifierNetwork
+from .pipeline import runPipeline
+from .pool import VMPool
+from .profiler import IntcodeProfiler
+from .replay import ReplayComputer
+from .scheduler import Scheduler
+from .symbolic import Linear, SymbolicFallback, symbolicRun
+from .trace import IntcodeTrace
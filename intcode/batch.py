@@ -0,0 +1,227 @@
+import numpy as np
+
+from .handlers import NPARAM
+
+################################
+#### BATCH INTCODE COMPUTER ####
+################################
+
+# runs many copies ("lanes") of the same program at once, each with a few memory cells patched
+# memory is an (nLanes, size) array, and one instruction is executed for a whole group of lanes
+# at a time with numpy, so 10,000 runs cost about as many steps as one run
+# the opcodes and parameter modes are the same as IntcodeComputer
+#
+# run as follows:
+#   batch = BatchIntcodeComputer(code, {1: nouns, 2: verbs})
+#   batch.run()
+#   batch.memory[:, 0]
+# where nouns and verbs are arrays with one value per lane
+#
+# lanes start in lockstep, all at the same pointer; if jumps send them different ways,
+# they are regrouped by pointer every step, and each group runs separately until they meet again
+# lanes at the same pointer are further split by the instruction there, since a lane may have
+# modified its own program
+#
+# some things work differently from IntcodeComputer:
+#   memory is dense, and grows to the highest address any lane writes, for every lane
+#   reading past the end gives 0, like reading a page that was never written, without growing it
+#   memory is capped at MAXCELLS cells over all the lanes, and a lane that writes past it is in error
+#   values are int64, so arithmetic can overflow silently
+#   inputs, if any, are the same list for every lane; running out of them is an error
+#   a lane that hits an invalid opcode or parameter mode, uses a negative address, or runs out of
+#   inputs doesn't stop the others; it halts and is marked in error, and makes no more writes
+class BatchIntcodeComputer():
+
+    NPARAM   = NPARAM
+    MAXCELLS = 1 << 27
+
+    # initialize with the program and the patches, a dictionary of address: array of values
+    def __init__(self, intcode, patches, inputs=None):
+        nLanes = len(next(iter(patches.values())))
+
+        self.memory  = np.tile(np.array(intcode, dtype=np.int64), (nLanes, 1))
+        for address, values in patches.items():
+            self.memory[:, address] = values
+
+        self.maxWidth = max(self.memory.shape[1], BatchIntcodeComputer.MAXCELLS // nLanes)
+
+        self.pointer = np.zeros(nLanes, dtype=np.int64)
+        self.relbase = np.zeros(nLanes, dtype=np.int64)
+        self.halt    = np.zeros(nLanes, dtype=bool)
+        self.error   = np.zeros(nLanes, dtype=bool)
+
+        self.inputs     = np.array(inputs if inputs is not None else [], dtype=np.int64)
+        self.inputIndex = np.zeros(nLanes, dtype=np.int64)
+        self.outputs    = [[] for lane in range(nLanes)]
+
+    # run every lane until it halts
+    # each round, group the running lanes by pointer and run one instruction per group
+    def run(self):
+        while not self.halt.all():
+            lanes = np.flatnonzero(~self.halt)
+            pointers, groups = np.unique(self.pointer[lanes], return_inverse=True)
+            for i, p in enumerate(pointers):
+                self.computeGroup(lanes[groups == i], int(p))
+
+    # make sure that every address below size exists, growing the memory (at least doubling it)
+    # size is at most maxWidth, see write
+    def addMemoryTill(self, size):
+        width = self.memory.shape[1]
+        if size > width:
+            extra = min(max(size, 2*width), self.maxWidth) - width
+            self.memory = np.pad(self.memory, ((0, 0), (0, extra)))
+
+    # memory[lanes, p:q], with 0 for anything past the end
+    def fetch(self, lanes, p, q):
+        cells = self.memory[lanes, p:q]
+        if cells.shape[1] < q - p:
+            cells = np.pad(cells, ((0, 0), (0, q - p - cells.shape[1])))
+        return cells
+
+    # lanes at the same pointer usually have the same instruction, but not necessarily
+    # lanes that jumped to a negative pointer are in error
+    def computeGroup(self, lanes, p):
+        if p < 0:
+            self.fail(lanes)
+            return
+        words = self.fetch(lanes, p, p+1)[:, 0]
+        for word in np.unique(words):
+            self.compute(lanes[words == word], p, int(word))
+
+    # implementation of parameter modes, for a whole group of lanes
+    # params[:, i] holds parameter i for each lane
+    # mode 0: position mode , return memory[p]
+    # mode 1: immediate mode, return p
+    # mode 2: relative mode , return memory[p + relbase]
+    # error: any other mode puts the lanes in error, and they read 0
+    def getValue(self, lanes, params, i, mode):
+        if   mode == 0:
+            return self.read(lanes, params[:, i])
+        elif mode == 1:
+            return params[:, i]
+        elif mode == 2:
+            return self.read(lanes, params[:, i] + self.relbase[lanes])
+        else:
+            self.fail(lanes)
+            return np.zeros(len(lanes), dtype=np.int64)
+
+    # implementation of parameter modes for write addresses
+    # mode 0: position mode, return o
+    # mode 2: relative mode, return o + relbase
+    # error: any other mode puts the lanes in error, and they don't write
+    def getAddress(self, lanes, params, i, mode):
+        if   mode == 0:
+            return params[:, i]
+        elif mode == 2:
+            return params[:, i] + self.relbase[lanes]
+        else:
+            self.fail(lanes)
+            return np.zeros(len(lanes), dtype=np.int64)
+
+    # memory[lane, address] for each lane, and its counterpart for writing
+    # reading past the end gives 0; lanes with a bad address read 0 and don't write, see checkAddresses
+    # lanes that went into error earlier in the instruction don't write either
+    def read(self, lanes, addresses):
+        addresses, good = self.checkAddresses(lanes, addresses, False)
+        inside = addresses < self.memory.shape[1]
+        return np.where(good & inside, self.memory[lanes, np.where(inside, addresses, 0)], 0)
+
+    def write(self, lanes, addresses, values):
+        addresses, good = self.checkAddresses(lanes, addresses, True)
+        good &= ~self.error[lanes]
+        if good.any():
+            self.addMemoryTill(int(addresses[good].max())+1)
+        self.memory[lanes[good], addresses[good]] = values[good]
+
+    # error: lanes with a negative address, or writing past maxWidth, are done, but the rest carry on
+    # return the addresses, with 0 in place of the bad ones, and which lanes are fine
+    def checkAddresses(self, lanes, addresses, writing):
+        good = addresses >= 0
+        if writing:
+            good &= addresses < self.maxWidth
+        if not good.all():
+            self.fail(lanes[~good])
+            addresses = np.where(good, addresses, 0)
+        return addresses, good
+
+    # these lanes are done, in error, but the rest carry on
+    def fail(self, lanes):
+        self.halt [lanes] = True
+        self.error[lanes] = True
+
+    # main computer
+    # processes the instruction word at pointer p, for every lane in lanes
+    # as in IntcodeComputer, the modes come from the digits above the last two
+    def compute(self, lanes, p, word):
+        opcode = word % 100
+
+        # error: these lanes are done, but the rest carry on
+        # a negative word isn't an instruction, even though its last two digits might look like one
+        if word < 0 or opcode not in BatchIntcodeComputer.NPARAM:
+            self.fail(lanes)
+            return
+
+        nParams = BatchIntcodeComputer.NPARAM[opcode]
+        modes   = [(word // 10**(i+2)) % 10 for i in range(nParams)]
+        params  = self.fetch(lanes, p+1, p+nParams+1)
+        newp    = np.full(len(lanes), p+nParams+1, dtype=np.int64)
+
+        # value(i, some) reads parameter i only for the lanes selected by some
+        value   = lambda i, some=slice(None): self.getValue(lanes[some], params[some], i, modes[i])
+        address = lambda i: self.getAddress(lanes, params, i, modes[i])
+
+        # add
+        if   opcode == 1:
+            self.write(lanes, address(2), value(0) + value(1))
+
+        # multiply
+        elif opcode == 2:
+            self.write(lanes, address(2), value(0) * value(1))
+
+        # input
+        # every lane consumes the next input from the same list
+        # error: lanes that have used up the inputs are done, but the rest carry on
+        elif opcode == 3:
+            index = self.inputIndex[lanes]
+            empty = index >= len(self.inputs)
+            self.fail(lanes[empty])
+            values = np.zeros(len(lanes), dtype=np.int64)
+            values[~empty] = self.inputs[index[~empty]]
+            self.write(lanes, address(0), values)
+            self.inputIndex[lanes] += 1
+
+        # output
+        # except from lanes that just went into error reading the value
+        elif opcode == 4:
+            for lane, v in zip(lanes, value(0)):
+                if not self.error[lane]:
+                    self.outputs[lane].append(int(v))
+
+        # jump if true
+        # as in IntcodeComputer, the target is only read by the lanes that jump
+        elif opcode == 5:
+            jump       = value(0) != 0
+            newp[jump] = value(1, jump)
+
+        # jump if false
+        elif opcode == 6:
+            jump       = value(0) == 0
+            newp[jump] = value(1, jump)
+
+        # less than
+        elif opcode == 7:
+            self.write(lanes, address(2), (value(0) < value(1)).astype(np.int64))
+
+        # equal to
+        elif opcode == 8:
+            self.write(lanes, address(2), (value(0) == value(1)).astype(np.int64))
+
+        # relative base adjust
+        elif opcode == 9:
+            self.relbase[lanes] += value(0)
+
+        # halt
+        elif opcode == 99:
+            self.halt[lanes] = True
+
+        self.pointer[lanes] = newp
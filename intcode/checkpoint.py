@@ -0,0 +1,166 @@
+import mmap
+import struct
+import sys
+from array import array
+
+from .computer import IntcodeComputer
+from .memory import PagedMemory
+
+#####################
+#### CHECKPOINTS ####
+#####################
+
+# save a computer to a binary file, and load it back later, possibly on another machine
+#
+# run as follows:
+#   saveCheckpoint(computer, 'checkpoint.bin')
+#   ...
+#   computer = loadCheckpoint('checkpoint.bin')
+#   computer.run()
+#
+# a checkpoint holds the memory, pointer, relative base, halt and wait booleans,
+# and any pending inputs and stored outputs; i.e. everything needed to carry on running
+# the decode and block caches are not saved, since they are rebuilt as the program runs,
+# and neither are the profiler or the output sink
+#
+# the file is, in order, all little endian:
+#   header     : see HEADER below
+#   page table : the index of every int64 page, then the index of every big page, 8 bytes each
+#   int64 pages: PAGESIZE int64 cells each, 8 byte aligned, so they load with one copy per page
+#   integers   : the inputs, the outputs, and the cells of every big page, see writeInt()
+# big pages are the ones holding a value that doesn't fit in 64 bits, see PagedMemory.promote()
+# the file is mapped rather than read, so only the pages actually in it are ever touched
+
+MAGIC   = b'INTC'
+VERSION = 1
+
+# magic, version, flags, page bits, pointer, relbase, inputs, outputs, int64 pages, big pages
+# the header is 64 bytes, so that everything after it stays 8 byte aligned
+HEADER = struct.Struct('<4sHHH6xqqqqqq')
+
+# bits of the flags field
+HALT, WAIT, STOREOUTPUTS, CONSOLE, TYPED = 1, 2, 4, 8, 16
+
+# a signed integer of any size: 4 bytes of length, then that many bytes of two's complement
+def writeInt(f, value):
+    data = value.to_bytes(value.bit_length() // 8 + 1, 'little', signed=True)
+    f.write(struct.pack('<I', len(data)))
+    f.write(data)
+
+# read back an integer written by writeInt, starting at offset; return it and the next offset
+def readInt(buffer, offset):
+    length, = struct.unpack_from('<I', buffer, offset)
+    offset += 4
+    return int.from_bytes(buffer[offset:offset+length], 'little', signed=True), offset + length
+
+# the cells of a page as int64 bytes, or None if some cell doesn't fit
+def pageBytes(page):
+    if not isinstance(page, array):
+        try:
+            page = array('q', page)
+        except OverflowError:
+            return None
+    if sys.byteorder == 'big':
+        page = page[:]
+        page.byteswap()
+    return page.tobytes()
+
+# write a checkpoint of computer to path
+def saveCheckpoint(computer, path):
+    memory = computer.intcode
+
+    dense, big = {}, {}
+    for index, page in sorted(memory.pages.items()):
+        data = pageBytes(page)
+        if data is None:
+            big[index] = page
+        else:
+            dense[index] = data
+
+    flags = (
+        (HALT         if computer.halt           else 0) |
+        (WAIT         if computer.wait           else 0) |
+        (STOREOUTPUTS if computer.storeOutputs   else 0) |
+        (CONSOLE      if computer.inputs is None else 0) |
+        (TYPED        if memory.typed            else 0)
+    )
+    inputs  = list(computer.inputs ) if computer.inputs is not None else []
+    outputs = list(computer.outputs) if computer.storeOutputs       else []
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, flags, PagedMemory.PAGEBITS,
+            computer.pointer, computer.relbase,
+            len(inputs), len(outputs), len(dense), len(big),
+        ))
+        f.write(struct.pack(f'<{len(dense)}q', *dense))
+        f.write(struct.pack(f'<{len(big)}q'  , *big  ))
+        for data in dense.values():
+            f.write(data)
+        for value in inputs + outputs:
+            writeInt(f, value)
+        for page in big.values():
+            for value in page:
+                writeInt(f, value)
+
+# load a checkpoint from path into a new computer, which carries on where the saved one left off
+# the backend is chosen as usual, see IntcodeComputer.setBackend()
+def loadCheckpoint(path, backend=None):
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        buffer = memoryview(mapped)
+        try:
+            return readCheckpoint(buffer, backend)
+        finally:
+            buffer.release()
+
+# the checkpoint in buffer, checked and unpacked into a new computer
+def readCheckpoint(buffer, backend):
+    magic, version, flags, pageBits, pointer, relbase, nInputs, nOutputs, nDense, nBig = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise Exception('Not an intcode checkpoint')
+    if version != VERSION:
+        raise Exception(f'Unsupported checkpoint version {version}')
+    if pageBits != PagedMemory.PAGEBITS:
+        raise Exception(f'Checkpoint has pages of {1 << pageBits} cells, not {PagedMemory.PAGESIZE}')
+
+    offset = HEADER.size
+    denseIndices = struct.unpack_from(f'<{nDense}q', buffer, offset)
+    offset += 8 * nDense
+    bigIndices   = struct.unpack_from(f'<{nBig}q', buffer, offset)
+    offset += 8 * nBig
+
+    typed = bool(flags & TYPED)
+    pages = {}
+    for index in denseIndices:
+        page = array('q')
+        page.frombytes(buffer[offset:offset + 8*PagedMemory.PAGESIZE])
+        if sys.byteorder == 'big':
+            page.byteswap()
+        pages[index] = page if typed else page.tolist()
+        offset += 8 * PagedMemory.PAGESIZE
+
+    values = []
+    for i in range(nInputs + nOutputs + nBig * PagedMemory.PAGESIZE):
+        value, offset = readInt(buffer, offset)
+        values.append(value)
+    inputs, outputs = values[:nInputs], values[nInputs:nInputs+nOutputs]
+    for i, index in enumerate(bigIndices):
+        start = nInputs + nOutputs + i * PagedMemory.PAGESIZE
+        pages[index] = values[start:start + PagedMemory.PAGESIZE]
+
+    computer = IntcodeComputer(
+        [],
+        inputs       = None if flags & CONSOLE else inputs,
+        storeOutputs = bool(flags & STOREOUTPUTS),
+        backend      = backend,
+        typed        = typed,
+    )
+    computer.intcode.pages    = pages
+    computer.intcode.writable = dict(pages)
+    computer.pointer = pointer
+    computer.relbase = relbase
+    computer.halt    = bool(flags & HALT)
+    computer.wait    = bool(flags & WAIT)
+    if computer.storeOutputs:
+        computer.outputs.extend(outputs)
+    return computer
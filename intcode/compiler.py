@@ -0,0 +1,132 @@
+from .handlers import NPARAM, READERS, ADDRESSERS
+
+########################
+#### BLOCK COMPILER ####
+########################
+
+# the compiled backend runs a whole basic block at once, see IntcodeComputer.computeBlock()
+# a block starts at the pointer and runs straight through arithmetic, comparisons, and
+# relative base adjusts, ending with (and including) a jump, or just before an input,
+# output, or halt, which are left to the interpreter, since they are the ones that can WAIT or HALT
+# jump targets start their own blocks the first time they are jumped to
+
+# opcodes that end a block before them, and opcodes that end a block after them
+STOPCODES = {3, 4, 99}
+JUMPCODES = {5, 6}
+
+# source for reading a parameter, given its mode; compare READERS
+# inside a block, mem is the memory and rb is the relative base
+def sourceValue(x, mode):
+    if   mode == 0:
+        return f'mem[{x}]'
+    elif mode == 1:
+        return f'{x}'
+    elif mode == 2:
+        return f'mem[rb + {x}]'
+
+# source for a write address, given its mode; compare ADDRESSERS
+def sourceAddress(o, mode):
+    if   mode == 0:
+        return f'{o}'
+    elif mode == 2:
+        return f'rb + {o}'
+
+# generate python source for the block of computer starting at start, compile it once, and cache it
+# the source looks like
+#   def block(self):
+#       mem = self.intcode
+#       ...
+#       o = 101
+#       mem[o] = mem[100] + mem[101]
+#       if o in cells:
+#           self.invalidate(o)
+#           self.pointer = 6
+#           return
+#       ...
+# every write checks whether it landed on code; if so, the code is invalidated and the
+# block bails out right after the write, so the interpreter picks up the modified program
+def compileBlock(computer, start):
+    lines      = []
+    blockCells = []
+    relbase    = False
+    jumped     = False
+    p          = start
+
+    # exit the block: hand the relative base back if it was touched, and move the pointer
+    def leave(target, indent):
+        out = []
+        if relbase:
+            out.append('self.relbase = rb')
+        out.extend([f'self.pointer = {target}', 'return'])
+        return [indent + line for line in out]
+
+    while not jumped:
+        opcode = computer.fetch(p) % 100
+        if opcode not in NPARAM or opcode in STOPCODES:
+            break
+
+        # anything the interpreter would raise on is left for the interpreter to raise
+        modes   = computer.getModes(p)
+        nParams = NPARAM[opcode]
+        params  = computer.fetch(p+1, p+nParams+1)
+        newp    = p + nParams + 1
+        reads   = modes[:2] if opcode in (1, 2, 7, 8) else modes
+        if any(mode not in READERS for mode in reads):
+            break
+        if opcode in (1, 2, 7, 8) and modes[2] not in ADDRESSERS:
+            break
+
+        value = [sourceValue(x, mode) for x, mode in zip(params, modes)]
+
+        # add, multiply, less than, equal to
+        if opcode in (1, 2, 7, 8):
+            if   opcode == 1:
+                result = f'{value[0]} + {value[1]}'
+            elif opcode == 2:
+                result = f'{value[0]} * {value[1]}'
+            elif opcode == 7:
+                result = f'1 if {value[0]} < {value[1]} else 0'
+            elif opcode == 8:
+                result = f'1 if {value[0]} == {value[1]} else 0'
+            lines.append(f'o = {sourceAddress(params[2], modes[2])}')
+            lines.append(f'mem[o] = {result}')
+            lines.append('if o in cells:')
+            lines.append('    self.invalidate(o)')
+            lines.extend(leave(newp, '    '))
+
+        # jump if true, jump if false
+        elif opcode in JUMPCODES:
+            test = '!=' if opcode == 5 else '=='
+            lines.append(f'if {value[0]} {test} 0:')
+            lines.extend(leave(value[1], '    '))
+            jumped = True
+
+        # relative base adjust
+        elif opcode == 9:
+            lines.append(f'rb += {value[0]}')
+            relbase = True
+
+        blockCells.extend(range(p, newp))
+        p = newp
+
+    if not lines:
+        computer.blocks[start] = None
+        return None
+
+    lines.extend(leave(p, ''))
+    source = '\n'.join(
+        ['def block(self):',
+         '    mem = self.intcode',
+         '    cells = self.codeCells',
+         '    rb = self.relbase'] +
+        ['    ' + line for line in lines]
+    )
+    namespace = {}
+    exec(compile(source, f'<intcode block {start}>', 'exec'), namespace)
+    block = namespace['block']
+
+    computer.blocks[start] = block
+    computer.codeCells.update(blockCells)
+    for a in blockCells:
+        computer.blockCells.setdefault(a, set()).add(start)
+    return block
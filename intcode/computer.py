@@ -0,0 +1,685 @@
+import copy
+import os
+from collections import deque
+
+from .compiler import compileBlock
+from .handlers import NPARAM, ADDRESSERS, makeHandler
+from .memory import PagedMemory
+from .peephole import MAXSPAN, fuse
+from .profiler import IntcodeProfiler
+from .trace import IntcodeTrace, INPUT, HALT
+
+##########################
+#### INTCODE COMPUTER ####
+##########################
+
+# the ways a computer can execute its program, mapped to the method that runs one step
+BACKENDS = {
+    'reference': 'computeReference',
+    'optimized': 'compute',
+    'compiled' : 'computeBlock',
+}
+DEFAULT_BACKEND = 'optimized'
+
+# what run() returns: why the computer stopped running
+HALTED  = 'halted'
+WAITING = 'waiting'
+BUDGET  = 'budget'
+
+# run as follows:
+#   computer = IntcodeComputer(code)
+#   computer.run()
+#
+# for programmatic inputs,
+#   computer = IntcodeComputer(code, inputs=[1, 2, ...])
+# or
+#   computer = IntcodeComputer(code)
+#   computer.setInputs([1, 2, ...])
+# before running
+#
+# for programmatic outputs,
+#   computer = IntcodeComputer(code, storeOutputs=True)
+# or
+#   computer = IntcodeComputer(code)
+#   computer.setStoreOutputs()
+# and collect them with computer.drain()
+#
+# for streaming outputs somewhere else as they are produced,
+#   computer = IntcodeComputer(code, outputSink=callback)
+# or
+#   computer = IntcodeComputer(code)
+#   computer.setOutputSink(callback)
+#
+# to branch off a copy of a computer, e.g. to try several inputs from the same state,
+#   other = computer.fork()
+# or, to come back to the same state later,
+#   saved = computer.snapshot()
+#   ...
+#   computer.restore(saved)
+# or, to come back to it in another process, or on another machine, see checkpoint.py
+#   saveCheckpoint(computer, 'checkpoint.bin')
+#   computer = loadCheckpoint('checkpoint.bin')
+#
+# to choose a backend, i.e. how the program is actually executed,
+#   computer = IntcodeComputer(code, backend='compiled')
+# or
+#   computer = IntcodeComputer(code)
+#   computer.setBackend('compiled')
+# the default is the INTCODE_BACKEND environment variable, or 'optimized' if it isn't set
+#   reference : parse every instruction every time it is executed; simple, and slow
+#   optimized : decode every instruction once, into a handler specialized for its modes
+#   compiled  : compile basic blocks into python functions, and run a block per step
+#
+# to keep memory in 64 bit arrays rather than lists of ints, e.g. when running many computers at once,
+#   computer = IntcodeComputer(code, typed=True)
+# values beyond 64 bits still work; the page they are on just goes back to being a list
+#
+# to keep one computer from running for too long, e.g. to share a thread with others,
+#   status = computer.run(maxSteps=1000)
+# which returns HALTED, WAITING (for input), or BUDGET (if it ran out of steps first)
+# see scheduler.py for running many computers this way
+#
+# to record every input and output of a run, e.g. to play it back later with ReplayComputer,
+#   computer.setTracing()
+#   computer.run()
+#   computer.trace.save('run.trace')
+#
+# to watch what a program does to some memory, or to its relative base, see addWatch()
+#   computer.addWatch(100, 110, reads=True)
+#   computer.addRelbaseHook(lambda computer, old, new: print(old, new))
+#   computer.run()
+#   computer.accessLog
+#
+# to profile a run,
+#   computer.setProfiling()
+#   computer.run()
+#   print(computer.profiler.report())
+
+class IntcodeComputer():
+
+    # map defining the recognized opcodes
+    # and how many parameters they take
+    NPARAM = NPARAM
+
+    # initialize with the program to be run
+    def __init__(self, intcode, inputs=None, storeOutputs=False, outputSink=None, backend=None, typed=False):
+        self.intcode = PagedMemory(intcode, typed)
+        self.pointer = 0
+        self.halt    = False
+        self.wait    = False
+        self.relbase = 0
+
+        # decode cache, see decode()
+        self.decoded   = {}
+        self.codeCells = set()
+        self.peephole  = True
+
+        # block compiler cache, see computeBlock()
+        self.blocks     = {}
+        self.blockCells = {}
+
+        self.outputSink = None
+        self.profiler   = None
+        self.trace      = None
+
+        # watchpoints and relative base hooks, see addWatch()
+        self.watches      = []
+        self.relbaseHooks = []
+        self.accessLog    = []
+
+        self.setInputs(inputs)
+        self.setStoreOutputs(storeOutputs)
+        self.setOutputSink(outputSink)
+        self.setBackend(backend)
+
+    # wrapper for setting inputs, used by the constructor or the user
+    # inputs are a queue: consumed from the left, added on the right
+    def setInputs(self, inputs):
+        if inputs is not None:
+            self.inputs = deque(inputs)
+        else:
+            self.inputs = None
+
+    # wrapper for programmatically adding inputs
+    # use this when the computer is in the WAIT state before running again
+    def addInput(self, code):
+        if self.inputs is not None:
+            self.inputs.append(code)
+
+    # wrapper for programmatically adding many inputs at once
+    def feed(self, codes):
+        if self.inputs is not None:
+            self.inputs.extend(codes)
+
+    # wrapper for storing outputs, used by the constructor or the user
+    def setStoreOutputs(self, flag=True):
+        self.storeOutputs = flag
+        if self.storeOutputs:
+            self.outputs = deque()
+        self.setEmit()
+
+    # wrapper for sending outputs to a callback instead, used by the constructor or the user
+    # the sink takes precedence over storing outputs
+    def setOutputSink(self, sink):
+        self.outputSink = sink
+        self.setEmit()
+
+    # choose once what happens to an output, so that the output instruction just calls emit
+    # sink it, store it, or print it; and record it first, if tracing
+    def setEmit(self):
+        if self.outputSink is not None:
+            self.emit = self.outputSink
+        elif self.storeOutputs:
+            self.emit = self.outputs.append
+        else:
+            self.emit = print
+        if self.trace is not None:
+            self.emit = self.trace.wrap(self.emit)
+
+    # return all of the stored outputs, in order, and forget them
+    def drain(self):
+        outputs = list(self.outputs)
+        self.outputs.clear()
+        return outputs
+
+    # wrapper for choosing the backend, used by the constructor or the user
+    # a backend is just the method that run() calls for every step, see BACKENDS
+    # while profiling or tracing, computeProfiled runs one instruction per step, whatever the backend
+    # while watching, compiled blocks are interpreted instead, since they go straight to memory,
+    # and the step is wrapped in computeWatched if there are relative base hooks
+    def setBackend(self, backend=None):
+        if backend is None:
+            backend = os.environ.get('INTCODE_BACKEND', DEFAULT_BACKEND)
+        if backend not in BACKENDS:
+            raise Exception(f'Unknown backend {backend}; choose from {", ".join(BACKENDS)}')
+        self.backend = backend
+
+        watching = self.watches or self.relbaseHooks
+        if self.profiler is not None or self.trace is not None:
+            self.step = self.computeProfiled
+        elif watching and backend == 'compiled':
+            self.step = self.compute
+        else:
+            self.step = getattr(self, BACKENDS[backend])
+        if self.relbaseHooks:
+            self.watchedStep = self.step
+            self.step        = self.computeWatched
+
+    # wrapper for turning the profiler on and off, which starts a new IntcodeProfiler
+    # profiling only swaps out the step function, so when it is off it costs nothing
+    # superinstructions are dropped, since the profiler counts the instructions they are made of
+    def setProfiling(self, flag=True):
+        self.profiler = IntcodeProfiler() if flag else None
+        if flag:
+            self.defuse()
+        self.setBackend(self.backend)
+
+    # wrapper for turning tracing on and off, which starts a new IntcodeTrace, see trace.py
+    # every input and output is recorded, along with how many instructions had run by then
+    # like profiling, it is counted one instruction at a time, so that the counts are the same
+    # whatever the backend
+    def setTracing(self, flag=True):
+        self.trace = IntcodeTrace() if flag else None
+        if flag:
+            self.defuse()
+        self.setEmit()
+        self.setBackend(self.backend)
+
+    # wrapper for turning the peephole optimizer on and off, see peephole.py
+    def setPeephole(self, flag=True):
+        self.peephole = flag
+        if not flag:
+            self.defuse()
+
+    # run the computer from pointer 0 with the stored program
+    # the WAIT boolean PAUSES execution if there are not enough inputs
+    # the only time WAIT is currently True is if there is a pending input
+    # so assert that there's at least one input before resetting WAIT and continuing
+    # with maxSteps, the computer also pauses after that many steps, and the next run carries on
+    # a step is one dispatch of the backend: an instruction, a superinstruction, or a compiled block
+    # returns HALTED, WAITING, or BUDGET if maxSteps ran out first
+    def run(self, maxSteps=None):
+        if self.wait:
+            assert(len(self.inputs) > 0)
+            self.wait = False
+        if self.profiler is not None:
+            self.profiler.resume()
+        step = self.step
+        if maxSteps is None:
+            while not self.halt and not self.wait:
+                step()
+        else:
+            for i in range(maxSteps):
+                if self.halt or self.wait:
+                    break
+                step()
+        if self.profiler is not None:
+            self.profiler.pause(self)
+        if self.halt:
+            return HALTED
+        if self.wait:
+            return WAITING
+        return BUDGET
+
+    # make an independent copy of this computer, in its current state
+    # memory is shared copy-on-write, so this costs a dictionary of pages, not the whole memory
+    # the decode and block caches are copied too, so the fork doesn't decode everything again
+    # bound methods (emit, step) have to be rebound to the new computer
+    def fork(self):
+        other = copy.copy(self)
+        other.intcode    = self.intcode.fork()
+        other.decoded    = dict(self.decoded)
+        other.codeCells  = set(self.codeCells)
+        other.blocks     = dict(self.blocks)
+        other.blockCells = {a: set(starts) for a, starts in self.blockCells.items()}
+        if self.inputs is not None:
+            other.inputs = deque(self.inputs)
+        if self.storeOutputs:
+            other.outputs = deque(self.outputs)
+        other.profiler = None
+        other.trace    = None
+        other.watches      = []
+        other.relbaseHooks = []
+        other.accessLog    = []
+        other.setWatching()
+        other.setEmit()
+        other.setBackend(self.backend)
+        return other
+
+    # a snapshot is just a fork that is kept aside and never run
+    def snapshot(self):
+        return self.fork()
+
+    # go back to the state in a snapshot
+    # the snapshot is forked again, so it can be restored as many times as needed
+    # the profiler and the trace, if any, keep counting, and the watchpoints keep watching
+    def restore(self, snapshot):
+        profiler, trace = self.profiler, self.trace
+        watches, relbaseHooks, accessLog = self.watches, self.relbaseHooks, self.accessLog
+        self.__dict__ = snapshot.fork().__dict__
+        self.profiler, self.trace = profiler, trace
+        self.watches, self.relbaseHooks, self.accessLog = watches, relbaseHooks, accessLog
+        self.setWatching()
+        self.setEmit()
+        self.setBackend(self.backend)
+
+    # go back to the state of snapshot, which this computer was forked from, like restore
+    # but rather than forking it again, only the memory pages written since are put back
+    # (see PagedMemory.reset), and only the cached instructions and blocks on cells that
+    # actually changed are dropped, like invalidate, except that the blocks can be compiled again
+    # so the computer keeps its pages and caches, which is what makes reusing it cheap, see VMPool
+    def reset(self, snapshot):
+        for p in self.intcode.reset(snapshot.intcode):
+            for q in range(p-MAXSPAN+1, p+1):
+                entry = self.decoded.get(q)
+                if entry is not None and q + entry[2] >= p:
+                    del self.decoded[q]
+            for start in self.blockCells.pop(p, ()):
+                self.blocks.pop(start, None)
+
+        self.pointer = snapshot.pointer
+        self.relbase = snapshot.relbase
+        self.halt    = snapshot.halt
+        self.wait    = snapshot.wait
+        self.setInputs(snapshot.inputs)
+        if self.storeOutputs:
+            self.outputs.clear()
+            self.outputs.extend(snapshot.outputs)
+
+    # for debugging purposes
+    # print the current pointer, the halt and wait booleans, the inputs and outputs
+    def inspectState(self):
+        print('Pointer: {:3d} Halt: {:5s} Wait: {:5s} RelBase: {} Inputs: {} Outputs: {}'.format(
+            self.pointer,
+            str(self.halt),
+            str(self.wait),
+            self.relbase,
+            list(self.inputs) if self.inputs is not None else None,
+            list(self.outputs) if self.storeOutputs else None,
+        ))
+
+
+    # abstract the access and write so that memory can be anywhere
+    # this is so that a program can access / write to memory beyond the size of the program itself
+    # the memory itself is a PagedMemory, which only allocates the pages that get written to
+    # so all access and writes can proceed without out-of-bound errors, however far away they are
+    # access: p ~ intcode[p]; p, q ~ intcode[p:q]
+    def access(self, p, q=None):
+        if q is None:
+            return self.intcode[p]
+        else:
+            return self.intcode.getRange(p, q)
+
+    # write: p, value ~ intcode[p] = value
+    # if p holds part of an already decoded instruction, that instruction is stale
+    def write(self, p, value):
+        self.intcode[p] = value
+        if p in self.codeCells:
+            self.invalidate(p)
+
+    # instruction fetches go through fetch rather than access, so that watchpoints only see
+    # the reads and writes of the program itself, see addWatch()
+    fetch = access
+
+    # watch the addresses from start up to (but not including) end, or just start
+    # every read (if reads) and write (if writes) of a watched address calls
+    #   callback(computer, kind, address, value)
+    # with kind 'read' or 'write'; the default callback appends
+    #   (pointer, kind, address, value)
+    # to computer.accessLog
+    # watching swaps in accessWatched and writeWatched as instance attributes, which every
+    # handler goes through; without watches they are removed again, and cost nothing
+    # return the watch, to pass to removeWatch
+    def addWatch(self, start, end=None, reads=False, writes=True, callback=None):
+        watch = (start, start+1 if end is None else end, reads, writes, callback or IntcodeComputer.logAccess)
+        self.watches.append(watch)
+        self.setWatching()
+        return watch
+
+    def removeWatch(self, watch):
+        self.watches.remove(watch)
+        self.setWatching()
+
+    # call hook(computer, old, new) after every step that changes the relative base
+    def addRelbaseHook(self, hook):
+        self.relbaseHooks.append(hook)
+        self.setBackend(self.backend)
+        return hook
+
+    def removeRelbaseHook(self, hook):
+        self.relbaseHooks.remove(hook)
+        self.setBackend(self.backend)
+
+    # install or remove the watched access and write, and choose the step to match
+    def setWatching(self):
+        if self.watches:
+            self.access = self.accessWatched
+            self.write  = self.writeWatched
+        else:
+            self.__dict__.pop('access', None)
+            self.__dict__.pop('write' , None)
+        self.setBackend(self.backend)
+
+    def logAccess(self, kind, address, value):
+        self.accessLog.append((self.pointer, kind, address, value))
+
+    # access and write, calling back any watches they touch
+    def accessWatched(self, p, q=None):
+        value = IntcodeComputer.access(self, p, q)
+        for start, end, reads, writes, callback in self.watches:
+            if not reads:
+                continue
+            if q is None:
+                if start <= p < end:
+                    callback(self, 'read', p, value)
+            else:
+                for a in range(max(p, start), min(q, end)):
+                    callback(self, 'read', a, value[a-p])
+        return value
+
+    def writeWatched(self, p, value):
+        IntcodeComputer.write(self, p, value)
+        for start, end, reads, writes, callback in self.watches:
+            if writes and start <= p < end:
+                callback(self, 'write', p, value)
+
+    # report how much memory the computer is actually holding, in cells
+    def resident(self):
+        return self.intcode.resident()
+
+
+    # given a pointer, cut up the opcode and get the modes
+    # Suppose the opcode is 01102: this is opcode 2, with the params in mode 1 1 0
+    # so get 110 by doing 01102 // 100 ( = 11), right justifying with 0s ( = 011), and reversing
+    def getModes(self, p):
+        opcode   = self.fetch(p) % 100
+        if opcode not in NPARAM:
+            raise Exception('{} is not a valid op code'.format(opcode))
+        parcodes = str(self.fetch(p) // 100).rjust(NPARAM[opcode], '0')
+        modes    = tuple( reversed([ int(i) for i in parcodes ]) )
+        return modes
+
+    # decode the instruction at p once and cache it, keyed by pointer
+    # an entry is (opcode, modes, nParams, handler, params, newp)
+    # the handler is specialized for this opcode and mode combination (see makeHandler)
+    # if the instruction starts a common idiom, it is cached along with the instruction after it
+    # as a superinstruction instead (see peephole.py), unless the peephole optimizer is off
+    # every address the instruction occupies goes into codeCells, so that write() can
+    # notice when a program modifies an instruction that has already been decoded
+    def decode(self, p):
+        opcode  = self.fetch(p) % 100
+        modes   = self.getModes(p)
+        nParams = NPARAM[opcode]
+        handler = makeHandler(opcode, modes)
+        params  = tuple(self.fetch(p+1, p+nParams+1))
+        entry   = (opcode, modes, nParams, handler, params, p+nParams+1)
+
+        if self.peephole and self.profiler is None and self.trace is None:
+            entry = fuse(self, p, entry) or entry
+
+        self.decoded[p] = entry
+        self.codeCells.update(range(p, p+entry[2]+1))
+        return entry
+
+    # drop every superinstruction from the decode cache; they will be decoded afresh
+    def defuse(self):
+        self.decoded = {q: entry for q, entry in self.decoded.items() if not isinstance(entry[0], str)}
+
+    # for debugging purposes
+    # the superinstructions currently in the decode cache, {p: (idiom, parts)}
+    # where parts maps the superinstruction back to its instructions, ((p, opcode, modes), ...)
+    def superinstructions(self):
+        return {q: (entry[0], entry[1]) for q, entry in self.decoded.items() if isinstance(entry[0], str)}
+
+    # a write landed on p, which some cached instruction occupies
+    # instructions (and superinstructions) are at most MAXSPAN words long, so only the few
+    # entries starting at or just before p can cover it; drop them and they will be decoded afresh
+    # compiled blocks covering p are dropped too, and are interpreted from then on
+    def invalidate(self, p):
+        for q in range(p-MAXSPAN+1, p+1):
+            entry = self.decoded.get(q)
+            if entry is not None and q + entry[2] >= p:
+                del self.decoded[q]
+        for start in self.blockCells.pop(p, ()):
+            self.blocks[start] = None
+
+    # main computer
+    # processes the intcode at the current pointer
+    # all of the parsing is done once per pointer by decode(); after that,
+    # a step is one dictionary lookup and one call to the specialized handler
+    def compute(self):
+        entry = self.decoded.get(self.pointer)
+        if entry is None:
+            entry = self.decode(self.pointer)
+        entry[3](self, entry[4], entry[5])
+
+    # same as compute, but counting the instruction in the profiler and / or the trace
+    # an input that has to WAIT didn't execute, and will be counted when it does
+    def computeProfiled(self):
+        p     = self.pointer
+        entry = self.decoded.get(p)
+        if entry is None:
+            entry = self.decode(p)
+        entry[3](self, entry[4], entry[5])
+        if self.wait:
+            return
+        if self.profiler is not None:
+            self.profiler.count(p, entry)
+        if self.trace is not None:
+            self.traceStep(entry)
+
+    # record an input or a halt in the trace (outputs are recorded by emit), and count the instruction
+    # the input is read back from where it was written, so that it is recorded even from the command line
+    # the halt is counted before it is recorded, so that a replay ends on the same count as the profiler
+    def traceStep(self, entry):
+        if entry[0] == 3:
+            self.trace.record(INPUT, self.fetch(ADDRESSERS[entry[1][0]](self, entry[4][0])))
+        self.trace.instructions += 1
+        if entry[0] == 99:
+            self.trace.record(HALT)
+
+    # the step while there are relative base hooks: whichever step would have run, then the hooks
+    def computeWatched(self):
+        relbase = self.relbase
+        self.watchedStep()
+        if self.relbase != relbase:
+            for hook in self.relbaseHooks:
+                hook(self, relbase, self.relbase)
+
+    # compiled backend
+    # run a whole basic block at once; see compiler.py for what a block is
+    # a block is None if there was nothing to compile, or if the program wrote into it
+    # either way, the optimized interpreter takes over for that step
+    def computeBlock(self):
+        p = self.pointer
+        if p in self.blocks:
+            block = self.blocks[p]
+        else:
+            block = compileBlock(self, p)
+        if block is None:
+            self.compute()
+        else:
+            block(self)
+
+    # implementation of parameter modes
+    # don't use for write positions; instead, use getAddress()
+    # mode 0: position mode , return access(p)
+    # mode 1: immediate mode, return p
+    # mode 2: relative mode , return access(p + relbase)
+    def getValue(self, p, mode):
+        if   mode == 0:
+            return self.access(p)
+        elif mode == 1:
+            return p
+        elif mode == 2:
+            return self.access(p + self.relbase)
+        else:
+            raise Exception(f'Unknown (read) parameter mode {mode}')
+
+    # implementation of parameter mode 2 for write addresses
+    # mode 0: position mode, return o
+    # mode 2: relative mode, return o + relbase
+    def getAddress(self, o, mode):
+        if   mode == 0:
+            return o
+        elif mode == 2:
+            return o + self.relbase
+        else:
+            raise Exception(f'Unknown (write) parameter mode {mode}')
+
+    # reference backend
+    # processes the intcode at the current pointer, parsing it from scratch every time
+    def computeReference(self):
+
+        p = self.pointer
+
+        # opcode is the last two digits of intcode[p]
+        # modes are the parameter modes, in the correct order (and of the correct length of parameters)
+        # parameters are just intcode[p+1] through intcode[p+1 + nParams]
+        # newp is where the pointer should move to; this is usually p + nParams + 1
+        # compute it first, and reset it if the instruction demands it
+
+        opcode = self.fetch(p) % 100
+        modes  = self.getModes(p)
+        params = self.fetch(p+1, p+NPARAM[opcode]+1)
+        newp   = p + NPARAM[opcode] + 1
+
+        # add
+        if   opcode == 1:
+            x , y , o  = params
+            mx, my, mo = modes
+            self.write(self.getAddress(o, mo), self.getValue(x, mx) + self.getValue(y, my))
+
+        # multiply
+        elif opcode == 2:
+            x , y , o  = params
+            mx, my, mo = modes
+            self.write(self.getAddress(o, mo), self.getValue(x, mx) * self.getValue(y, my))
+
+        # input
+        elif opcode == 3:
+            o  = params[0]
+            mo = modes [0]
+
+            # get input from the command line if inputs is None
+            if self.inputs is None:
+                i = input('Provide input: ')
+
+            # get input from the front of the inputs queue if it exists
+            else:
+
+                # consume the next available input
+                if len(self.inputs) > 0:
+                    i = self.inputs.popleft()
+
+                # if there aren't any, pause execution
+                # the run loop will break when this wait boolean is True
+                # immediately end the computation
+                # the next time run is called, wait will be reset to False
+                # no pointers have changed, no modifications were made
+                # so execution will resume from where it last left off
+                else:
+                    self.wait = True
+                    return
+
+            self.write(self.getAddress(o, mo), int(i))
+
+        # output
+        elif opcode == 4:
+            x  = params[0]
+            mx = modes [0]
+
+            # print output, store the outputs, or send them to the sink
+            self.emit(self.getValue(x, mx))
+
+        # jump if true
+        elif opcode == 5:
+            t , v  = params
+            mt, mv = modes
+            if self.getValue(t, mt) != 0:
+                newp = self.getValue(v, mv)
+
+        # jump if false
+        elif opcode == 6:
+            t , v  = params
+            mt, mv = modes
+            if self.getValue(t, mt) == 0:
+                newp = self.getValue(v, mv)
+
+        # less than
+        elif opcode == 7:
+            a , b , o  = params
+            ma, mb, mo = modes
+            if self.getValue(a, ma) < self.getValue(b, mb):
+                self.write(self.getAddress(o, mo), 1)
+            else:
+                self.write(self.getAddress(o, mo), 0)
+
+        # equal to
+        elif opcode == 8:
+            a , b , o  = params
+            ma, mb, mo = modes
+            if self.getValue(a, ma) == self.getValue(b, mb):
+                self.write(self.getAddress(o, mo), 1)
+            else:
+                self.write(self.getAddress(o, mo), 0)
+
+        # relative base adjust
+        elif opcode == 9:
+            x  = params[0]
+            mx = modes [0]
+            value = self.getValue(x, mx)
+            self.relbase += value
+
+        # halt
+        elif opcode == 99:
+            self.pointer = newp
+            self.halt    = True
+            return
+
+        # error
+        else:
+            raise Exception(f'{opcode} is not a valid op code')
+
+        self.pointer = newp
+        self.halt    = False
@@ -0,0 +1,169 @@
+##################
+#### HANDLERS ####
+##################
+
+# the handlers that the optimized backend runs, one per opcode and combination of modes
+# a handler is a function of the computer, so that it can be shared by every computer
+
+# map defining the recognized opcodes
+# and how many parameters they take
+NPARAM = {1:3, 2:3, 3:1, 4:1, 5:2, 6:2, 7:3, 8:3, 9:1, 99:0}
+
+# implementation of parameter modes, one small function per mode
+# so that a handler can pick its readers once, when it is made, instead of every step
+# don't use READERS for write positions; instead, use ADDRESSERS
+# mode 0: position mode , return access(p)
+# mode 1: immediate mode, return p
+# mode 2: relative mode , return access(p + relbase)
+READERS = {
+    0: lambda self, p: self.access(p),
+    1: lambda self, p: p,
+    2: lambda self, p: self.access(p + self.relbase),
+}
+
+# implementation of parameter mode 2 for write addresses
+# mode 0: position mode, return o
+# mode 2: relative mode, return o + relbase
+ADDRESSERS = {
+    0: lambda self, o: o,
+    2: lambda self, o: o + self.relbase,
+}
+
+# longest instruction, in words (opcode + parameters)
+MAXLEN = max(NPARAM.values()) + 1
+
+# cache of handlers, keyed by (opcode, modes)
+# there are only a few hundred combinations, so they are shared by every computer
+HANDLERS = {}
+
+# look up the readers / addressers for a set of modes
+# which parameters are write positions depends on the opcode
+def getReader(mode):
+    if mode not in READERS:
+        raise Exception(f'Unknown (read) parameter mode {mode}')
+    return READERS[mode]
+
+def getAddresser(mode):
+    if mode not in ADDRESSERS:
+        raise Exception(f'Unknown (write) parameter mode {mode}')
+    return ADDRESSERS[mode]
+
+# build (or fetch) the handler for an opcode with a given combination of modes
+# a handler takes the computer, the params of the instruction, and the default newp
+# newp is where the pointer should move to; this is usually p + nParams + 1
+# a handler sets it itself, since jumps, inputs, and halts all treat it differently
+def makeHandler(opcode, modes):
+    key = (opcode, modes)
+    if key in HANDLERS:
+        return HANDLERS[key]
+
+    read    = getReader
+    address = getAddresser
+
+    # add
+    if   opcode == 1:
+        rx, ry, wo = read(modes[0]), read(modes[1]), address(modes[2])
+        def handler(self, params, newp):
+            x, y, o = params
+            self.write(wo(self, o), rx(self, x) + ry(self, y))
+            self.pointer = newp
+
+    # multiply
+    elif opcode == 2:
+        rx, ry, wo = read(modes[0]), read(modes[1]), address(modes[2])
+        def handler(self, params, newp):
+            x, y, o = params
+            self.write(wo(self, o), rx(self, x) * ry(self, y))
+            self.pointer = newp
+
+    # input
+    elif opcode == 3:
+        wo = address(modes[0])
+        def handler(self, params, newp):
+
+            # get input from the command line if inputs is None
+            if self.inputs is None:
+                i = input('Provide input: ')
+
+            # get input from the front of the inputs queue if it exists
+            else:
+
+                # consume the next available input
+                if len(self.inputs) > 0:
+                    i = self.inputs.popleft()
+
+                # if there aren't any, pause execution
+                # the run loop will break when this wait boolean is True
+                # immediately end the computation
+                # the next time run is called, wait will be reset to False
+                # no pointers have changed, no modifications were made
+                # so execution will resume from where it last left off
+                else:
+                    self.wait = True
+                    return
+
+            self.write(wo(self, params[0]), int(i))
+            self.pointer = newp
+
+    # output
+    elif opcode == 4:
+        rx = read(modes[0])
+        def handler(self, params, newp):
+
+            # print output, store the outputs, or send them to the sink
+            self.emit(rx(self, params[0]))
+            self.pointer = newp
+
+    # jump if true
+    elif opcode == 5:
+        rt, rv = read(modes[0]), read(modes[1])
+        def handler(self, params, newp):
+            t, v = params
+            if rt(self, t) != 0:
+                newp = rv(self, v)
+            self.pointer = newp
+
+    # jump if false
+    elif opcode == 6:
+        rt, rv = read(modes[0]), read(modes[1])
+        def handler(self, params, newp):
+            t, v = params
+            if rt(self, t) == 0:
+                newp = rv(self, v)
+            self.pointer = newp
+
+    # less than
+    elif opcode == 7:
+        ra, rb, wo = read(modes[0]), read(modes[1]), address(modes[2])
+        def handler(self, params, newp):
+            a, b, o = params
+            self.write(wo(self, o), 1 if ra(self, a) < rb(self, b) else 0)
+            self.pointer = newp
+
+    # equal to
+    elif opcode == 8:
+        ra, rb, wo = read(modes[0]), read(modes[1]), address(modes[2])
+        def handler(self, params, newp):
+            a, b, o = params
+            self.write(wo(self, o), 1 if ra(self, a) == rb(self, b) else 0)
+            self.pointer = newp
+
+    # relative base adjust
+    elif opcode == 9:
+        rx = read(modes[0])
+        def handler(self, params, newp):
+            self.relbase += rx(self, params[0])
+            self.pointer = newp
+
+    # halt
+    elif opcode == 99:
+        def handler(self, params, newp):
+            self.pointer = newp
+            self.halt    = True
+
+    # error
+    else:
+        raise Exception(f'{opcode} is not a valid op code')
+
+    HANDLERS[key] = handler
+    return handler
@@ -0,0 +1,12 @@
+################
+#### LOADER ####
+################
+
+# every puzzle input is a single line of comma separated integers
+def parseProgram(text):
+    return list(map(int, text.strip().split(',')))
+
+# read a program from a file, e.g. loadProgram('input9.txt')
+def loadProgram(path):
+    with open(path) as f:
+        return parseProgram(f.read())
@@ -0,0 +1,140 @@
+from array import array
+
+######################
+#### PAGED MEMORY ####
+######################
+
+# memory for the intcode computer, split into pages of PAGESIZE cells
+# a page is only allocated the first time something is written to it,
+# so a write to address 10**9 costs one page, not 10**9 zeros
+# reading from a page that was never written just gives 0, as if it had been allocated
+# reads and writes are one dictionary lookup and one list index, no matter the address
+#
+# pages are also copy-on-write: fork() makes a second memory that shares every page,
+# and a page is only copied the first time either memory writes to it
+# a memory may write in place to the pages it owns, which are in one of two dictionaries:
+# writable holds the ones written since the last fork or reset, i.e. the dirty ones,
+# and owned the ones that haven't been, which only move over to writable when next written
+#
+# typed memory keeps its pages in array('q') instead of lists, i.e. 8 bytes a cell instead
+# of a pointer to an int object, and a page is copied with one memcpy instead of a refcount per cell
+# a value that doesn't fit in 64 bits promotes just its own page to a list, which holds anything,
+# so the computer never sees a difference, except in how much memory it holds
+class PagedMemory():
+
+    PAGEBITS = 10
+    PAGESIZE = 1 << PAGEBITS
+    PAGEMASK = PAGESIZE - 1
+    ZEROPAGE = array('q', bytes(8 * PAGESIZE))
+
+    # initialize with the program, which is copied into as many pages as it needs
+    def __init__(self, intcode=(), typed=False):
+        self.typed = typed
+        self.pages = {}
+        for start in range(0, len(intcode), PagedMemory.PAGESIZE):
+            page = list(intcode[start:start+PagedMemory.PAGESIZE])
+            page.extend([0] * (PagedMemory.PAGESIZE - len(page)))
+            self.pages[start >> PagedMemory.PAGEBITS] = self.makePage(page)
+        self.writable = dict(self.pages)
+        self.owned    = {}
+
+    # a page holding values, as an array if the memory is typed and they all fit in 64 bits
+    def makePage(self, values):
+        if self.typed:
+            try:
+                return array('q', values)
+            except OverflowError:
+                pass
+        return list(values)
+
+    # memory[p]
+    # negative addresses can never have been written, so only check for them on a miss
+    def __getitem__(self, p):
+        page = self.pages.get(p >> PagedMemory.PAGEBITS)
+        if page is None:
+            if p < 0:
+                raise Exception(f'Negative memory address {p}')
+            return 0
+        return page[p & PagedMemory.PAGEMASK]
+
+    # memory[p] = value, allocating the page on first touch
+    # or copying it on first touch, if it is shared with another memory
+    # or just marking it dirty on first touch, if it is owned but clean
+    def __setitem__(self, p, value):
+        index = p >> PagedMemory.PAGEBITS
+        page  = self.writable.get(index)
+        if page is None:
+            page = self.owned.pop(index, None)
+            if page is None:
+                page = self.pages.get(index)
+                if page is None:
+                    if p < 0:
+                        raise Exception(f'Negative memory address {p}')
+                    page = PagedMemory.ZEROPAGE[:] if self.typed else [0] * PagedMemory.PAGESIZE
+                else:
+                    page = page[:]
+                self.pages[index] = page
+            self.writable[index] = page
+        try:
+            page[p & PagedMemory.PAGEMASK] = value
+        except OverflowError:
+            self.promote(index)[p & PagedMemory.PAGEMASK] = value
+
+    # replace a typed page with a list holding the same values, for values beyond 64 bits
+    # the page is only ever promoted once; lists never overflow
+    def promote(self, index):
+        page = list(self.pages[index])
+        self.pages   [index] = page
+        self.writable[index] = page
+        self.owned.pop(index, None)
+        return page
+
+    # memory[p:q], without allocating anything
+    def getRange(self, p, q):
+        return [self[i] for i in range(p, q)]
+
+    # number of cells actually allocated
+    def resident(self):
+        return len(self.pages) * PagedMemory.PAGESIZE
+
+    # number of pages that had to be promoted to lists, 0 if the memory isn't typed
+    def promoted(self):
+        if not self.typed:
+            return 0
+        return sum(1 for page in self.pages.values() if isinstance(page, list))
+
+    # go back to the contents of clean, which this memory was forked from (directly or not),
+    # and return the addresses of the cells that had to change
+    # only the pages written since the last fork or reset (the writable ones) can differ from clean;
+    # those are overwritten in place and kept as owned, so that the next run doesn't have to copy
+    # them again, and isn't charged for them at its own reset unless it writes to them again
+    # clean must not have been written to since, which holds if nothing ever runs it
+    def reset(self, clean):
+        changed = []
+        for index, page in self.writable.items():
+            cleanPage = clean.pages.get(index)
+            start     = index << PagedMemory.PAGEBITS
+            if cleanPage is None:
+                changed.extend(start + k for k, value in enumerate(page) if value != 0)
+                del self.pages[index]
+                continue
+            if type(page) is type(cleanPage) and page == cleanPage:
+                self.owned[index] = page
+                continue
+            changed.extend(start + k for k, (value, cleanValue) in enumerate(zip(page, cleanPage)) if value != cleanValue)
+            if type(page) is type(cleanPage):
+                page[:] = cleanPage
+                self.owned[index] = page
+            else:
+                self.pages[index] = cleanPage
+        self.writable = {}
+        return changed
+
+    # a second memory with the same contents, sharing every page
+    # neither memory owns any page afterwards, so whichever writes first makes its own copy
+    def fork(self):
+        other = PagedMemory(typed=self.typed)
+        other.pages   = dict(self.pages)
+        self.writable = {}
+        self.owned    = {}
+        return other
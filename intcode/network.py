@@ -0,0 +1,100 @@
+import asyncio
+
+###########################
+#### AMPLIFIER NETWORK ####
+###########################
+
+# an asyncio runtime for wiring computers together
+# every computer is a node with its own bounded input queue
+# connect(a, b) sends every output of a into the input queue of b, so chains,
+# rings, and fan-out (one node connected to several) are all just lists of connections
+# sink(a) also collects the outputs of a, so that the answer can be read off afterwards
+#
+# run as follows:
+#   network = AmplifierNetwork()
+#   network.addNode('A', IntcodeComputer(code, inputs=[phase], storeOutputs=True))
+#   ...
+#   network.connect('A', 'B')
+#   network.feed('A', 0)
+#   outputs = network.sink('E')
+#   asyncio.run(network.run())
+#
+# a node only runs when it has input: it runs its computer until it halts or WAITs,
+# passes on any outputs, and then awaits its input queue, so idle nodes cost nothing
+# a node that is blocked sending to a full queue keeps taking in its own inputs in the meantime
+# a node that halts never reads its queue again, so outputs sent to it from then on are dropped,
+# and its queue is emptied, in case another node is blocked putting into it
+class AmplifierNetwork():
+
+    # maxsize bounds every input queue; a node that gets too far ahead blocks on put
+    def __init__(self, maxsize=16):
+        self.maxsize   = maxsize
+        self.computers = {}
+        self.queues    = {}
+        self.targets   = {}
+        self.sinks     = {}
+        self.halted    = set()
+
+    # add a computer as a node; it should store its outputs
+    def addNode(self, name, computer):
+        self.computers[name] = computer
+        self.queues   [name] = asyncio.Queue(self.maxsize)
+        self.targets  [name] = []
+
+    # every output of source goes to the input queue of target
+    def connect(self, source, target):
+        self.targets[source].append(target)
+
+    # put an initial value into a node's input queue
+    def feed(self, name, value):
+        self.queues[name].put_nowait(value)
+
+    # collect every output of a node into a list, which is returned
+    def sink(self, name):
+        return self.sinks.setdefault(name, [])
+
+    # one node: wait for input if it needs it, run until halt or WAIT, and pass on outputs
+    async def runNode(self, name):
+        computer = self.computers[name]
+        queue    = self.queues[name]
+        while True:
+            if computer.wait and len(computer.inputs) == 0:
+                computer.addInput(await queue.get())
+
+            computer.run()
+            for value in computer.drain():
+                if name in self.sinks:
+                    self.sinks[name].append(value)
+                for target in self.targets[name]:
+                    if target not in self.halted:
+                        await self.send(name, target, value)
+
+            if computer.halt:
+                self.halted.add(name)
+                while not queue.empty():
+                    queue.get_nowait()
+                return
+
+    # put value into the input queue of target, for node name
+    # while that queue is full, keep moving the node's own queue into the inputs of its computer,
+    # so that nodes in a ring, each sending the next one more than fits, can't all block on each other
+    async def send(self, name, target, value):
+        computer = self.computers[name]
+        queue    = self.queues[name]
+        put      = asyncio.ensure_future(self.queues[target].put(value))
+        while not put.done():
+            get = asyncio.ensure_future(queue.get())
+            await asyncio.wait((put, get), return_when=asyncio.FIRST_COMPLETED)
+            if get.done():
+                computer.addInput(get.result())
+            else:
+                # a cancelled get leaves the queue as it was
+                get.cancel()
+                try:
+                    await get
+                except asyncio.CancelledError:
+                    pass
+
+    # run every node until they have all halted
+    async def run(self):
+        await asyncio.gather(*[self.runNode(name) for name in self.computers])
@@ -0,0 +1,156 @@
+import operator
+
+from .handlers import NPARAM, MAXLEN, READERS, ADDRESSERS, makeHandler
+
+##################
+#### PEEPHOLE ####
+##################
+
+# a peephole pass over the decode cache of the optimized backend, see IntcodeComputer.decode()
+# when an instruction is decoded, the one right after it is peeked at, and if the two make up
+# one of the idioms below, they are cached together as a single superinstruction:
+# one dictionary lookup and one handler call, instead of two of each
+#   compare-jump  : less than / equal to (7, 8), then a jump (5, 6), e.g. 1008 x 5 c; 1005 c t
+#   counter-jump  : a counter, then a jump (5, 6), e.g. 1001 c -1 c; 1005 c t
+#   counter       : add an immediate to a cell in place, e.g. 1001 c -1 c, on its own
+#   relbase-load  : relative base adjust (9), then an instruction reading in relative mode
+#
+# a superinstruction has exactly the semantics of its parts, run one after the other
+# in particular, if the first part writes into the superinstruction itself, the second part
+# is not run; the pointer is left on it, so that it is decoded afresh from the modified program
+#
+# a superinstruction is a decode cache entry like any other, except that
+#   opcode is the name of the idiom, e.g. 'compare-jump'
+#   modes is the pointer mapping, ((p, opcode, modes), ...), one per part, for debugging
+#   nParams is the length of the whole superinstruction, minus one, so that invalidate() finds it
+
+# a superinstruction is at most two instructions
+MAXSPAN = 2 * MAXLEN
+
+# which parameter of an opcode is a write address, if any
+WRITES = {1: 2, 2: 2, 3: 0, 7: 2, 8: 2}
+
+# cache of superinstruction handlers, keyed by the idiom and the opcodes and modes of its parts
+FUSED = {}
+
+# the instruction at q, as (opcode, modes, params, newp), without decoding it into the cache
+# None if q doesn't hold a valid instruction, e.g. because it is data; peeking never raises
+def peek(computer, q):
+    word = computer.fetch(q)
+    if word < 0 or word % 100 not in NPARAM:
+        return None
+    opcode  = word % 100
+    nParams = NPARAM[opcode]
+    modes   = computer.getModes(q)
+    if len(modes) != nParams:
+        return None
+    for i, mode in enumerate(modes):
+        if mode not in (ADDRESSERS if WRITES.get(opcode) == i else READERS):
+            return None
+    return opcode, modes, tuple(computer.fetch(q+1, q+nParams+1)), q+nParams+1
+
+# if an add is a counter, i.e. c = c + k or c = k + c, return (k, c, mode of c), otherwise None
+def counter(modes, params):
+    (mx, my, mo), (x, y, o) = modes, params
+    if mo in ADDRESSERS and mx == mo and my == 1 and x == o:
+        return y, o, mo
+    if mo in ADDRESSERS and my == mo and mx == 1 and y == o:
+        return x, o, mo
+    return None
+
+# given the decode cache entry for the instruction at p, return a superinstruction
+# starting with it, or None if it doesn't start one of the idioms
+def fuse(computer, p, entry):
+    opcode, modes, nParams, handler, params, mid = entry
+
+    if opcode in (7, 8):
+        second = peek(computer, mid)
+        if second is not None and second[0] in (5, 6):
+            return makeEntry('compare-jump', p, entry, second, params + second[2] + (p, mid))
+
+    elif opcode == 1 and counter(modes, params) is not None:
+        k, o, mo = counter(modes, params)
+        second   = peek(computer, mid)
+        if second is not None and second[0] in (5, 6):
+            return makeEntry('counter-jump', p, entry, second, (k, o) + second[2] + (p, mid))
+        return ('counter', ((p, opcode, modes),), nParams, makeFused('counter', entry, None), (k, o), mid)
+
+    elif opcode == 9:
+        second = peek(computer, mid)
+        if second is not None and 2 in [mode for i, mode in enumerate(second[1]) if WRITES.get(second[0]) != i]:
+            return makeEntry('relbase-load', p, entry, second, (params[0], second[2], mid))
+
+    return None
+
+# a decode cache entry for a superinstruction of two parts
+def makeEntry(name, p, first, second, params):
+    newp  = second[3]
+    parts = ((p, first[0], first[1]), (first[5], second[0], second[1]))
+    return (name, parts, newp - p - 1, makeFused(name, first, second), params, newp)
+
+# build (or fetch) the handler for a superinstruction; compare makeHandler
+# a handler takes the computer, the params of the superinstruction, and where it ends
+# for the idioms that write, params end with p and mid, the start of the second part,
+# so that a write into the superinstruction itself can be noticed and bailed out of
+def makeFused(name, first, second):
+    key = (name, first[0], first[1]) + ((second[0], second[1]) if second is not None else ())
+    if key in FUSED:
+        return FUSED[key]
+
+    # compare, then jump
+    if name == 'compare-jump':
+        (ma, mb, mo), (mt, mv) = first[1], second[1]
+        ra, rb, wo = READERS[ma], READERS[mb], ADDRESSERS[mo]
+        rt, rv     = READERS[mt], READERS[mv]
+        compare    = operator.lt if first[0] == 7 else operator.eq
+        jumpIf     = second[0] == 5
+        def handler(self, params, newp):
+            a, b, o, t, v, p, mid = params
+            w = wo(self, o)
+            self.write(w, 1 if compare(ra(self, a), rb(self, b)) else 0)
+            if p <= w < newp:
+                self.pointer = mid
+                return
+            if (rt(self, t) != 0) == jumpIf:
+                newp = rv(self, v)
+            self.pointer = newp
+
+    # add to a counter, then jump
+    elif name == 'counter-jump':
+        mo, (mt, mv) = counter(first[1], first[4])[2], second[1]
+        wo     = ADDRESSERS[mo]
+        rt, rv = READERS[mt], READERS[mv]
+        jumpIf = second[0] == 5
+        def handler(self, params, newp):
+            k, o, t, v, p, mid = params
+            w = wo(self, o)
+            self.write(w, self.access(w) + k)
+            if p <= w < newp:
+                self.pointer = mid
+                return
+            if (rt(self, t) != 0) == jumpIf:
+                newp = rv(self, v)
+            self.pointer = newp
+
+    # add to a counter
+    elif name == 'counter':
+        wo = ADDRESSERS[counter(first[1], first[4])[2]]
+        def handler(self, params, newp):
+            k, o = params
+            w = wo(self, o)
+            self.write(w, self.access(w) + k)
+            self.pointer = newp
+
+    # adjust the relative base, then run the next instruction as usual
+    # the pointer is moved onto the second part first, in case it is an input that has to WAIT
+    elif name == 'relbase-load':
+        rx = READERS[first[1][0]]
+        hb = makeHandler(second[0], second[1])
+        def handler(self, params, newp):
+            x, paramsB, mid = params
+            self.relbase += rx(self, x)
+            self.pointer  = mid
+            hb(self, paramsB, newp)
+
+    FUSED[key] = handler
+    return handler
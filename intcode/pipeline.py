@@ -0,0 +1,246 @@
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+from .computer import IntcodeComputer, HALTED
+
+##################
+#### PIPELINE ####
+##################
+
+# run a chain of computers, e.g. amplifiers, one process per computer, so that a long chain
+# (or feedback loop) with a lot of work per stage can use one core per stage
+# the computers all run the same program, each with its own initial inputs (e.g. a phase)
+# signals go from one stage to the next through Channels, ring buffers in shared memory,
+# instead of being pickled through pipes
+#
+# run as follows, e.g. for puzzle 7, part 2:
+#   runPipeline(program, [[phase] for phase in phaseSettings], feedback=True)
+# which returns the last output of the last stage, once every stage has halted
+#
+# stage i reads from channel i and writes to channel i+1; initial goes into channel 0
+# with feedback, the last stage writes to channel 0, closing the loop
+# otherwise, there is one more channel, which this process drains
+# every signal has to fit in 64 bits
+# a stage that halts discards its source channel, so whatever is still sent to it is dropped
+# rather than blocking the stage before it forever
+# and a stage whose sink is full keeps taking in its own inputs while it waits, so two stages
+# sending to each other (e.g. in a feedback loop) can't both be stuck on full channels
+
+# how often, in seconds, to check on the other side while waiting for it
+POLL = 0.1
+
+#################
+#### CHANNEL ####
+#################
+
+# a single producer, single consumer queue of int64 in shared memory
+# the memory holds the write index, the read index, and the discard flag,
+# then capacity slots of (kind, value)
+# two semaphores count the full and the empty slots, so put blocks when the queue is full
+# and get blocks when it is empty; each index is only ever written by one side
+# a producer that is done closes the channel, and get returns None from then on
+# a consumer that is done discards the channel, and put (and close) do nothing from then on
+class Channel():
+
+    DATA, CLOSED = 0, 1
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.memory   = shared_memory.SharedMemory(create=True, size=8 * (3 + 2*capacity))
+        self.full     = multiprocessing.Semaphore(0)
+        self.empty    = multiprocessing.Semaphore(capacity)
+        self.attach()
+        self.cells[0] = 0
+        self.cells[1] = 0
+        self.cells[2] = 0
+
+    def attach(self):
+        self.cells = self.memory.buf.cast('q')
+
+    # sent to other processes without the view, which is made again on the other side
+    def __getstate__(self):
+        return self.capacity, self.memory, self.full, self.empty
+
+    def __setstate__(self, state):
+        self.capacity, self.memory, self.full, self.empty = state
+        self.attach()
+
+    # return True once value is in (or dropped), or False if no slot frees up within timeout
+    # the discard flag is checked again once a slot is free, since the consumer may have
+    # discarded the channel (and released a slot to wake this side up) in the meantime
+    def put(self, value, kind=DATA, timeout=None):
+        cells = self.cells
+        if cells[2]:
+            return True
+        if not self.empty.acquire(timeout=timeout):
+            return False
+        if cells[2]:
+            self.empty.release()
+            return True
+        slot  = 3 + 2 * (cells[0] % self.capacity)
+        try:
+            cells[slot+1] = value
+        except ValueError:
+            self.empty.release()
+            raise Exception(f'Signal {value} does not fit in 64 bits')
+        cells[slot] = kind
+        cells[0] += 1
+        self.full.release()
+        return True
+
+    # with a timeout, raise TimeoutError if nothing comes in time
+    def get(self, timeout=None):
+        if not self.full.acquire(timeout=timeout):
+            raise TimeoutError
+        cells = self.cells
+        slot  = 3 + 2 * (cells[1] % self.capacity)
+        kind, value = cells[slot], cells[slot+1]
+        if kind == Channel.CLOSED:
+            self.full.release()
+            return None
+        cells[1] += 1
+        self.empty.release()
+        return value
+
+    def close(self):
+        self.put(0, Channel.CLOSED)
+
+    # drop everything put from now on, and wake up a producer blocked on a full queue
+    def discard(self):
+        self.cells[2] = 1
+        self.empty.release()
+
+    # let go of the shared memory, in a process that is done with the channel
+    def detach(self):
+        self.cells.release()
+        self.memory.close()
+
+    # free the shared memory; only for the process that made the channel, once everyone is done
+    def destroy(self):
+        self.detach()
+        self.memory.unlink()
+
+###############
+#### STAGE ####
+###############
+
+# one stage, in its own process: run the computer, sending outputs down the sink channel
+# and waiting on the source channel whenever it needs input, until it halts
+# then discard the source, close the sink, and report the last output (or what went wrong) to results
+def runStage(index, program, inputs, backend, source, sink, results):
+    last, closed = None, False
+    computer = None
+
+    # move whatever is already in the source into the inputs of the computer, without blocking
+    def take():
+        nonlocal closed
+        while not closed:
+            try:
+                value = source.get(timeout=0)
+            except TimeoutError:
+                return
+            if value is None:
+                closed = True
+            else:
+                computer.addInput(value)
+
+    # while the sink is full, keep taking inputs, in case the stage downstream is waiting on this one
+    def emit(value):
+        nonlocal last
+        last = value
+        while not sink.put(value, timeout=POLL):
+            take()
+
+    try:
+        computer = IntcodeComputer(program, inputs=inputs, outputSink=emit, backend=backend)
+        while computer.run() != HALTED:
+            if len(computer.inputs) > 0:
+                continue
+            value = source.get()
+            if value is None:
+                raise Exception(f'Stage {index} is waiting for input, but its source has closed')
+            computer.addInput(value)
+        results.put((index, last, None))
+    except Exception as error:
+        results.put((index, None, repr(error)))
+    finally:
+        source.discard()
+        sink.close()
+        source.detach()
+        sink.detach()
+
+# run program as a chain of stages, see above; return the last output of the last stage
+# a stage whose process dies without reporting, e.g. because it was killed, is an error,
+# and so is the whole pipeline taking more than timeout seconds, if given
+def runPipeline(program, stageInputs, feedback=False, initial=(0,), capacity=1024, backend=None, timeout=None):
+    nStages  = len(stageInputs)
+    channels = [Channel(capacity) for i in range(nStages if feedback else nStages+1)]
+    results  = multiprocessing.Queue()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        for value in initial:
+            channels[0].put(value)
+
+        processes = [
+            multiprocessing.Process(target=runStage, args=(
+                index, program, list(stageInputs[index]), backend,
+                channels[index], channels[(index+1) % len(channels)], results,
+            ))
+            for index in range(nStages)
+        ]
+        for process in processes:
+            process.start()
+
+        # the last channel has to be drained, or the last stage blocks once it is full
+        # a stage that fails can leave the one before it blocked on a full channel forever,
+        # so stop everything at the first error
+        lasts, errors = {}, []
+        def collect(wait):
+            index, last, error = results.get(timeout=wait)
+            lasts[index] = last
+            if error is not None:
+                errors.append(f'Stage {index}: {error}')
+
+        drained = feedback
+        while len(lasts) < nStages and not errors:
+            if deadline is not None and time.monotonic() > deadline:
+                errors.append(f'Pipeline did not finish within {timeout} seconds')
+                break
+
+            if not drained:
+                try:
+                    drained = channels[-1].get(timeout=POLL) is None
+                    continue
+                except TimeoutError:
+                    pass
+
+            try:
+                collect(POLL if drained else 0)
+                continue
+            except queue.Empty:
+                pass
+
+            # a stage reports before its process exits, so one that has exited
+            # without a report in the queue is never going to report
+            dead = [index for index in range(nStages) if index not in lasts and processes[index].exitcode is not None]
+            if dead:
+                try:
+                    collect(POLL)
+                    continue
+                except queue.Empty:
+                    errors.extend(f'Stage {index}: exited with code {processes[index].exitcode} without reporting' for index in dead)
+
+        if errors:
+            for process in processes:
+                process.terminate()
+        for process in processes:
+            process.join()
+    finally:
+        for channel in channels:
+            channel.destroy()
+
+    if errors:
+        raise Exception('; '.join(errors))
+    return lasts[nStages-1]
@@ -0,0 +1,35 @@
+#################
+#### VM POOL ####
+#################
+
+# hands out computers that all start in the same state, and takes them back to be reused
+# a new computer is a fork of the template; a returned one is reset to the template, which only
+# puts back the memory pages it wrote to, and keeps its decode and block caches for the next run
+# so a search that runs the same program thousands of times mostly reuses a handful of computers
+#
+# run as follows:
+#   pool = VMPool(IntcodeComputer(code, storeOutputs=True))
+#   computer = pool.acquire()
+#   computer.addInput(1)
+#   computer.run()
+#   ...
+#   pool.release(computer)
+#
+# the template is snapshotted when the pool is made, so it can carry on being used elsewhere
+# a computer that is released must have come from this pool, and not be used again until acquired
+class VMPool():
+
+    def __init__(self, template):
+        self.template = template.snapshot()
+        self.free     = []
+
+    # a computer in the template's state
+    def acquire(self):
+        if self.free:
+            return self.free.pop()
+        return self.template.fork()
+
+    # take a computer back, resetting it for the next acquire
+    def release(self, computer):
+        computer.reset(self.template)
+        self.free.append(computer)
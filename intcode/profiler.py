@@ -0,0 +1,91 @@
+import json
+import time
+from collections import Counter
+
+##################
+#### PROFILER ####
+##################
+
+# statistics about where an intcode program spends its time, see IntcodeComputer.setProfiling()
+#   opcodes      : how many times each opcode was executed
+#   pointers     : how many times each instruction (by pointer) was executed
+#   modes        : how many parameters were read or written in each mode
+#   instructions : total number of instructions executed
+#   runTime      : wall time spent inside run(), in seconds
+#   waitTime     : wall time spent in the WAIT state, between runs, in seconds
+#   highWater    : the most memory the computer has held, in cells
+class IntcodeProfiler():
+
+    def __init__(self):
+        self.opcodes      = Counter()
+        self.pointers     = Counter()
+        self.modes        = Counter()
+        self.instructions = 0
+        self.runTime      = 0.
+        self.waitTime     = 0.
+        self.highWater    = 0
+
+        self.runStart     = None
+        self.waitStart    = None
+
+    # count one executed instruction, given its pointer and its decode cache entry
+    def count(self, p, entry):
+        self.instructions += 1
+        self.opcodes [entry[0]] += 1
+        self.pointers[p]        += 1
+        for mode in entry[1]:
+            self.modes[mode] += 1
+
+    # called at the start and end of run()
+    # a run that ends in WAIT starts the wait clock, and the next run stops it
+    def resume(self):
+        now = time.perf_counter()
+        if self.waitStart is not None:
+            self.waitTime += now - self.waitStart
+            self.waitStart = None
+        self.runStart = now
+
+    def pause(self, computer):
+        now = time.perf_counter()
+        self.runTime  += now - self.runStart
+        self.highWater = max(self.highWater, computer.resident())
+        if computer.wait:
+            self.waitStart = now
+
+    def instructionsPerSecond(self):
+        return self.instructions / self.runTime if self.runTime > 0 else 0.
+
+    # everything, as a dictionary; hot lists only the top pointers
+    def asDict(self, hot=20):
+        return {
+            'instructions'         : self.instructions,
+            'instructionsPerSecond': self.instructionsPerSecond(),
+            'runTime'              : self.runTime,
+            'waitTime'             : self.waitTime,
+            'highWater'            : self.highWater,
+            'opcodes'              : dict(self.opcodes.most_common()),
+            'modes'                : dict(self.modes.most_common()),
+            'pointers'             : dict(self.pointers.most_common(hot)),
+        }
+
+    def toJSON(self, hot=20):
+        return json.dumps(self.asDict(hot), indent=2)
+
+    # text report, with every table sorted from most to least frequent
+    def report(self, hot=20):
+        lines = [
+            f'Instructions: {self.instructions}',
+            f'Run time    : {self.runTime:.6f} s ({self.instructionsPerSecond():.0f} instructions/s)',
+            f'Wait time   : {self.waitTime:.6f} s',
+            f'High water  : {self.highWater} cells',
+            'Opcodes:',
+        ]
+        for opcode, n in self.opcodes.most_common():
+            lines.append(f'  {opcode:3d} {n:12d} {100*n/self.instructions:6.2f}%')
+        lines.append('Modes:')
+        for mode, n in self.modes.most_common():
+            lines.append(f'  {mode:3d} {n:12d}')
+        lines.append(f'Hot pointers (top {hot}):')
+        for p, n in self.pointers.most_common(hot):
+            lines.append(f'  {p:6d} {n:12d} {100*n/self.instructions:6.2f}%')
+        return '\n'.join(lines)
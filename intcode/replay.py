@@ -0,0 +1,107 @@
+from collections import deque
+
+from .computer import HALTED, WAITING, BUDGET
+from .trace import INPUT, OUTPUT, HALT
+
+#########################
+#### REPLAY COMPUTER ####
+#########################
+
+# plays back a trace instead of running the program, for the price of a loop over its events
+# it has the same interface as IntcodeComputer for inputs, outputs, and run(), so it can stand in
+# for one wherever the program is known to be deterministic, e.g. a diagnostic rerun with the
+# same inputs over and over
+#
+# every input it is given is checked against the trace; if the program would have been given
+# something else, it might have done something else, so the replay raises rather than guess
+# running out of inputs WAITs, just like IntcodeComputer
+# with inputs=None, which would mean the command line for IntcodeComputer, the inputs in the
+# trace are taken as given, without asking for or checking anything
+class ReplayComputer():
+
+    def __init__(self, trace, inputs=None, storeOutputs=False, outputSink=None):
+        self.trace   = trace
+        self.event   = 0
+        self.halt    = False
+        self.wait    = False
+
+        self.outputSink = None
+        self.setInputs(inputs)
+        self.setStoreOutputs(storeOutputs)
+        self.setOutputSink(outputSink)
+
+    # inputs and outputs work the same as for IntcodeComputer
+    def setInputs(self, inputs):
+        if inputs is not None:
+            self.inputs = deque(inputs)
+        else:
+            self.inputs = None
+
+    def addInput(self, code):
+        if self.inputs is not None:
+            self.inputs.append(code)
+
+    def feed(self, codes):
+        if self.inputs is not None:
+            self.inputs.extend(codes)
+
+    def setStoreOutputs(self, flag=True):
+        self.storeOutputs = flag
+        if self.storeOutputs:
+            self.outputs = deque()
+        self.setEmit()
+
+    def setOutputSink(self, sink):
+        self.outputSink = sink
+        self.setEmit()
+
+    def setEmit(self):
+        if self.outputSink is not None:
+            self.emit = self.outputSink
+        elif self.storeOutputs:
+            self.emit = self.outputs.append
+        else:
+            self.emit = print
+
+    def drain(self):
+        outputs = list(self.outputs)
+        self.outputs.clear()
+        return outputs
+
+    # how many instructions the real computer would have executed by now
+    @property
+    def instructions(self):
+        if self.event == 0:
+            return 0
+        return self.trace.events[self.event-1][0]
+
+    # play back events until the trace halts, or an input is needed that hasn't been given
+    # maxSteps counts events, and returns like IntcodeComputer.run()
+    def run(self, maxSteps=None):
+        if self.wait:
+            assert(len(self.inputs) > 0)
+            self.wait = False
+        events    = self.trace.events
+        steps     = 0
+        while not self.halt:
+            if self.event == len(events):
+                raise Exception('Trace ended before the program halted')
+            if maxSteps is not None and steps == maxSteps:
+                return BUDGET
+
+            instructions, kind, value = events[self.event]
+            if kind == INPUT and self.inputs is not None:
+                if len(self.inputs) == 0:
+                    self.wait = True
+                    return WAITING
+                given = self.inputs.popleft()
+                if given != value:
+                    raise Exception(f'Input {given} diverges from the trace, which expects {value}')
+            elif kind == OUTPUT:
+                self.emit(value)
+            elif kind == HALT:
+                self.halt = True
+
+            self.event += 1
+            steps      += 1
+        return HALTED
@@ -0,0 +1,98 @@
+from collections import deque
+
+from .computer import HALTED, WAITING
+
+###################
+#### SCHEDULER ####
+###################
+
+# run many computers in one thread, a slice of steps at a time, so none of them can starve the rest
+# every computer is a node, like in AmplifierNetwork; connect(a, b) sends every output of a
+# straight into the inputs of b, and sink(a) also collects the outputs of a into a list
+#
+# run as follows:
+#   scheduler = Scheduler(quantum=1000)
+#   scheduler.addNode('A', IntcodeComputer(code, inputs=[phase]))
+#   ...
+#   scheduler.connect('A', 'B')
+#   scheduler.feed('A', 0)
+#   outputs = scheduler.sink('E')
+#   scheduler.run()
+#
+# computers that are ready take turns, round robin, each running for weight * quantum steps
+# a computer that WAITs is parked until something gives it input, so idle ones cost nothing
+# a computer that HALTs is done
+# run() returns when every computer has halted, or when the rest are all waiting for input
+# that nothing is going to give them; those are returned, so a deadlock is easy to spot
+class Scheduler():
+
+    def __init__(self, quantum=1000):
+        self.quantum   = quantum
+        self.computers = {}
+        self.weights   = {}
+        self.targets   = {}
+        self.sinks     = {}
+        self.ready     = deque()
+        self.waiting   = set()
+        self.halted    = set()
+
+    # add a computer as a node; its outputs are taken over by the scheduler
+    # weight is how many quanta it gets per turn, for computers that deserve more of the thread
+    def addNode(self, name, computer, weight=1):
+        self.computers[name] = computer
+        self.weights  [name] = weight
+        self.targets  [name] = []
+        computer.setOutputSink(lambda value: self.emit(name, value))
+        self.ready.append(name)
+
+    # every output of source goes to the inputs of target
+    def connect(self, source, target):
+        self.targets[source].append(target)
+
+    # give a node an input, waking it up if it was waiting for one
+    def feed(self, name, value):
+        self.computers[name].addInput(value)
+        if name in self.waiting:
+            self.waiting.remove(name)
+            self.ready.append(name)
+
+    # collect every output of a node into a list, which is returned
+    def sink(self, name):
+        return self.sinks.setdefault(name, [])
+
+    # the output sink of every node
+    def emit(self, name, value):
+        if name in self.sinks:
+            self.sinks[name].append(value)
+        for target in self.targets[name]:
+            self.feed(target, value)
+
+    # run every node until they have all halted, or are all stuck waiting for input
+    # return the names of the stuck nodes
+    def run(self):
+        while True:
+            if not self.ready:
+                self.wake()
+                if not self.ready:
+                    return set(self.waiting)
+
+            name     = self.ready.popleft()
+            computer = self.computers[name]
+            if computer.wait and len(computer.inputs) == 0:
+                self.waiting.add(name)
+                continue
+            status   = computer.run(maxSteps=self.weights[name] * self.quantum)
+
+            if status == HALTED:
+                self.halted.add(name)
+            elif status == WAITING and len(computer.inputs) == 0:
+                self.waiting.add(name)
+            else:
+                self.ready.append(name)
+
+    # nodes can also be given input directly, with addInput, rather than through feed
+    # so before giving up, look for waiting nodes that have input after all
+    def wake(self):
+        for name in [name for name in self.waiting if len(self.computers[name].inputs) > 0]:
+            self.waiting.remove(name)
+            self.ready.append(name)
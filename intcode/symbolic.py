@@ -0,0 +1,96 @@
+############################
+#### SYMBOLIC EXECUTION ####
+############################
+
+# a value that is a linear function of some input cells: const + sum of coeff * cell
+# e.g. after running a program with cells 1 and 2 as inputs, memory[0] might be 360000*x1 + x2 + 797908
+class Linear():
+
+    def __init__(self, const=0, terms=None):
+        self.const = const
+        self.terms = terms if terms is not None else {}
+
+    # the value of the input cell at address
+    @staticmethod
+    def variable(address):
+        return Linear(0, {address: 1})
+
+    def isConstant(self):
+        return len(self.terms) == 0
+
+    def coefficient(self, address):
+        return self.terms.get(address, 0)
+
+    # sums of linear functions are linear
+    def __add__(self, other):
+        terms = dict(self.terms)
+        for address, coeff in other.terms.items():
+            terms[address] = terms.get(address, 0) + coeff
+        return Linear(self.const + other.const, {a: c for a, c in terms.items() if c != 0})
+
+    # products are only linear if one side is a constant; otherwise None, for unknown
+    def __mul__(self, other):
+        if not self.isConstant() and not other.isConstant():
+            return None
+        if other.isConstant():
+            self, other = other, self
+        k = self.const
+        return Linear(k * other.const, {a: k * c for a, c in other.terms.items() if k * c != 0})
+
+    def __str__(self):
+        return ' + '.join([f'{c}*x{a}' for a, c in sorted(self.terms.items())] + [str(self.const)])
+
+    def __repr__(self):
+        return self.__str__()
+
+# raised when symbolic execution can't continue, and the answer has to be found concretely
+class SymbolicFallback(Exception):
+    pass
+
+# same as running a program that only adds and multiplies, but the cells in inputs hold variables, not numbers
+# every cell holds a Linear, or None if its value is unknown (i.e. not a linear function of the inputs)
+# a read from an address that depends on the inputs gives an unknown value, which is fine as long
+# as it never reaches the answer (typical programs overwrite such cells right away)
+# a write to such an address, or an instruction that depends on the inputs, could do anything,
+# so give up with SymbolicFallback
+def symbolicRun(intcode, inputs):
+    memory = [Linear(value) for value in intcode]
+    for address in inputs:
+        memory[address] = Linear.variable(address)
+
+    # a concrete address, or None if it depends on the inputs
+    def getAddress(value):
+        if value is None or not value.isConstant():
+            return None
+        if not 0 <= value.const < len(memory):
+            raise SymbolicFallback(f'Address {value.const} is out of range')
+        return value.const
+
+    p = 0
+    while True:
+        if p >= len(memory) or memory[p] is None:
+            raise SymbolicFallback(f'No known instruction at {p}')
+        if not memory[p].isConstant():
+            raise SymbolicFallback(f'Instruction at {p} depends on the inputs')
+        opcode = memory[p].const
+
+        if opcode == 99:
+            return memory
+
+        if opcode not in (1, 2):
+            raise SymbolicFallback(f'{opcode} is not a valid op code')
+
+        p1, p2, o = [getAddress(value) for value in memory[p+1:p+4]]
+        if o is None:
+            raise SymbolicFallback(f'Write address at {p+3} depends on the inputs')
+
+        x = memory[p1] if p1 is not None else None
+        y = memory[p2] if p2 is not None else None
+        if x is None or y is None:
+            memory[o] = None
+        elif opcode == 1:
+            memory[o] = x + y
+        else:
+            memory[o] = x * y
+
+        p += 4
@@ -0,0 +1,112 @@
+###############
+#### TRACE ####
+###############
+
+# a record of everything a computer consumed and produced, see IntcodeComputer.setTracing()
+# events is a list of (instructions, kind, value), where instructions is how many instructions
+# had been executed when the event happened, and kind is one of
+#   INPUT  : the program consumed value as an input
+#   OUTPUT : the program produced value as an output
+#   HALT   : the program halted; value is always 0, and instructions includes the halt itself
+#
+# run as follows:
+#   computer = IntcodeComputer(code, inputs=[1], storeOutputs=True)
+#   computer.setTracing()
+#   computer.run()
+#   computer.trace.save('diagnostic.trace')
+# and later, see ReplayComputer,
+#   replay = ReplayComputer(IntcodeTrace.load('diagnostic.trace'), inputs=[1], storeOutputs=True)
+#   replay.run()
+#
+# the trace file is a 4 byte magic, a version byte, and then two varints per event:
+#   (instructions since the previous event) << 2 | kind, and the zigzagged value
+# so a typical event takes 2 or 3 bytes
+INPUT, OUTPUT, HALT = 0, 1, 2
+
+MAGIC   = b'ICTR'
+VERSION = 1
+
+# unsigned LEB128: 7 bits at a time, low bits first, high bit set on every byte but the last
+def writeVarint(buffer, n):
+    while n >= 0x80:
+        buffer.append((n & 0x7f) | 0x80)
+        n >>= 7
+    buffer.append(n)
+
+# read back a varint written by writeVarint, starting at offset; return it and the next offset
+def readVarint(data, offset):
+    n, shift = 0, 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        n |= (byte & 0x7f) << shift
+        shift += 7
+        if byte < 0x80:
+            return n, offset
+
+# signed to unsigned, so that small negative numbers stay small: 0, -1, 1, -2, ... -> 0, 1, 2, 3, ...
+def zigzag(value):
+    return 2*value if value >= 0 else -2*value - 1
+
+def unzigzag(n):
+    return n >> 1 if n % 2 == 0 else -(n >> 1) - 1
+
+class IntcodeTrace():
+
+    def __init__(self):
+        self.events       = []
+        self.instructions = 0
+
+    # an event, at the current instruction count
+    def record(self, kind, value=0):
+        self.events.append((self.instructions, kind, value))
+
+    # an output sink that records every output before passing it on to emit
+    def wrap(self, emit):
+        def traced(value):
+            self.record(OUTPUT, value)
+            emit(value)
+        return traced
+
+    # the inputs and outputs, in order
+    def inputs(self):
+        return [value for instructions, kind, value in self.events if kind == INPUT]
+
+    def outputs(self):
+        return [value for instructions, kind, value in self.events if kind == OUTPUT]
+
+    # the trace file format, see above
+    def toBytes(self):
+        buffer = bytearray(MAGIC)
+        buffer.append(VERSION)
+        last = 0
+        for instructions, kind, value in self.events:
+            writeVarint(buffer, (instructions - last) << 2 | kind)
+            writeVarint(buffer, zigzag(value))
+            last = instructions
+        return bytes(buffer)
+
+    @staticmethod
+    def fromBytes(data):
+        if data[:4] != MAGIC:
+            raise Exception('Not an intcode trace')
+        if data[4] != VERSION:
+            raise Exception(f'Unsupported trace version {data[4]}')
+        trace  = IntcodeTrace()
+        offset = 5
+        while offset < len(data):
+            head , offset = readVarint(data, offset)
+            value, offset = readVarint(data, offset)
+            trace.instructions += head >> 2
+            trace.record(head & 3, unzigzag(value))
+        return trace
+
+    # write the trace to path, and read it back
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.toBytes())
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return IntcodeTrace.fromBytes(f.read())
@@ -1,87 +1,84 @@
-# given input position p and full intcode program intcode
-# return the new memory and a boolean for whether or not to break
-def compute(p, intcode):
-    four = intcode[p:p+4]
-
-    if four[0] == 1:
-        p1, p2, o = four[1], four[2], four[3]
-        intcode[o] = intcode[p1] + intcode[p2]
-
-    elif four[0] == 2:
-        p1, p2, o = four[1], four[2], four[3]
-        intcode[o] = intcode[p1] * intcode[p2]
-
-    elif four[0] == 99:
-        return intcode, True
-
-    else:
-        raise ValueError
-
-    return intcode, False
-
-# part 1
-# replace positions 1 and 2 with 12 and 2
-# then return the number in position 0 once the program halts
-
-code = None
-with open('input2.txt') as f:
-    for line in f:
-        code = list(map(int, line.strip('\n').split(',')))
-
-code[1] = 12
-code[2] = 2
-
-currentPos = 0
-while True:
-    newCode, halt = compute(currentPos, code)
-    if not halt:
-        code = newCode
-        currentPos += 4
-    else:
-        break
-
-print('Part 1:', code[0])
-
-# part 2
-# for pairs of inputs placed at positions 1 and 2, figure out the one that produces 19690720
-# give the answer as 100*i1 + i2
-
-# master code
-code = None
-with open('input2.txt') as f:
-    for line in f:
-        code = list(map(int, line.strip('\n').split(',')))
-
-# master check
-CHECKCODE = 19690720
-
-for i1 in range(100):
-    for i2 in range(100):
-        tempCode = code[:]
-        tempCode[1] = i1
-        tempCode[2] = i2
-
-        # this part is the same as above
-        currentPos = 0
-        while True:
-            newCode, halt = compute(currentPos, tempCode)
-            if not halt:
-                tempCode = newCode
-                currentPos += 4
-            else:
-                break
-
-        if tempCode[0] != CHECKCODE: continue
-
-        print('Part 2:', 100*i1 + i2)
-
-        # weird shenanigans
-        # so the loop continues if it's not broken
-        # else executes continue if it's not broken
-        # so the "default" operation is to break unless continued
-        # even though the continue happens most of the time
-
-        break
-    else:
-        continue
-    break
+from intcode import IntcodeComputer, SymbolicFallback, loadProgram, symbolicRun
+
+# run the program with noun and verb at positions 1 and 2; return memory[0]
+def runNounVerb(intcode, noun, verb):
+    intcode = intcode[:]
+    intcode[1] = noun
+    intcode[2] = verb
+
+    computer = IntcodeComputer(intcode)
+    computer.run()
+    return computer.access(0)
+
+# find the noun and verb (each in range(100)) for which the program leaves target in memory[0]
+# run the program once symbolically; if memory[0] comes out as a*noun + b*verb + c,
+# solve for the verb given each noun, instead of running the program for every pair
+# every candidate is still checked by running it for real
+# if the program isn't linear in the noun and verb, sweep every pair with BatchIntcodeComputer
+# either way, the answer is the pair with the smallest noun, then the smallest verb
+def solveNounVerb(intcode, target):
+    try:
+        result = symbolicRun(intcode, (1, 2))[0]
+    except SymbolicFallback:
+        result = None
+
+    if result is None:
+        return sweepNounVerb(intcode, target)
+
+    a, b, c = result.coefficient(1), result.coefficient(2), result.const
+    for noun in range(100):
+        remainder = target - c - a*noun
+        if b == 0:
+            verbs = range(100) if remainder == 0 else []
+        elif remainder % b == 0 and 0 <= remainder // b < 100:
+            verbs = [remainder // b]
+        else:
+            verbs = []
+        for verb in verbs:
+            if runNounVerb(intcode, noun, verb) == target:
+                return noun, verb
+
+    return None
+
+# brute force: every pair of inputs is a lane of one batch, so the whole sweep runs in one pass
+# lane i has noun, verb = divmod(i, 100), so the first lane to match is the same pair
+# that nested loops over the noun and the verb would have found first
+# the batch is int64 and wraps around silently, so a lane can match by accident;
+# every candidate is checked by running it for real, as with the symbolic solution
+# numpy is only needed for the sweep, so it is imported here; the rest runs without it
+def sweepNounVerb(intcode, target):
+    import numpy as np
+    from intcode.batch import BatchIntcodeComputer
+
+    nouns, verbs = np.divmod(np.arange(100*100), 100)
+    batch        = BatchIntcodeComputer(intcode, {1: nouns, 2: verbs})
+    batch.run()
+
+    for lane in np.flatnonzero((batch.memory[:, 0] == target) & ~batch.error):
+        noun, verb = int(nouns[lane]), int(verbs[lane])
+        if runNounVerb(intcode, noun, verb) == target:
+            return noun, verb
+    return None
+
+if __name__ == '__main__':
+
+    # part 1
+    # replace positions 1 and 2 with 12 and 2
+    # then return the number in position 0 once the program halts
+
+    code = loadProgram('input2.txt')
+
+    print('Part 1:', runNounVerb(code, 12, 2))
+
+    # part 2
+    # for pairs of inputs placed at positions 1 and 2, figure out the one that produces 19690720
+    # give the answer as 100*i1 + i2
+
+    # master check
+    CHECKCODE = 19690720
+
+    # if no pair produces it, there is no answer to print
+    pair = solveNounVerb(code, CHECKCODE)
+    if pair is not None:
+        noun, verb = pair
+        print('Part 2:', 100*noun + verb)
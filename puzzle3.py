@@ -1,216 +1,388 @@
-########################
-#### POSITION CLASS ####
-########################
-
-# the heart of this solution: a Position class
-class Position():
-    # initialize with the current position, the direction it came from, and the amount it came from
-    # the amount is not necessary for part 1, but it is for part 2
-    def __init__(self, x, y, lastDir, amount):
-        self.x = x
-        self.y = y
-        self.lastDir = lastDir
-        self.amount = amount
-
-    # increment makes a new position with that information given one of the LRDU + number tags
-    def increment(self, direction, amount):
-        newX, newY = self.x, self.y
-
-        if   direction == 'L':
-            newX -= amount
-
-        elif direction == 'R':
-            newX += amount
-
-        elif direction == 'D':
-            newY -= amount
-
-        elif direction == 'U':
-            newY += amount
-
-        return Position(newX, newY, direction, amount)
-
-    # displacement computes a displacement vector between this position and another position
-    # (initially conceived to be the next position)
-    # that vector is returned with a 0 for amount and lastDir = which way the displacement was
-    def displacement(self, other):
-        disp = Position(other.x - self.x, other.y - self.y, None, 0)
-
-        if disp.x == 0:
-            if disp.y > 0:
-                disp.lastDir = 'U'
-            else:
-                disp.lastDir = 'D'
-        elif disp.y == 0:
-            if disp.x > 0:
-                disp.lastDir = 'R'
-            else:
-                disp.lastDir = 'L'
-
-        return disp
-
-    # given two displacements, determine if they are orthogonal
-    def isOrthogonal(self, other):
-        if   self.lastDir in 'LR' and other.lastDir in 'UD':
-            return True
-        elif self.lastDir in 'UD' and other.lastDir in 'LR':
-            return True
-        return False
-
-    # compute manhattan distance from (0, 0) -- interpret carefully if this is a displacement
-    def manhattan(self):
-        return abs(self.x) + abs(self.y)
-
-    # string representations
-    def __str__(self):
-        return '({}, {})'.format(self.x, self.y)
-
-    def __repr__(self):
-        return self.__str__()
+import bisect
+import heapq
+import itertools
+import multiprocessing
+import re
+from array import array
+
+import numpy as np
+
+####################
+#### WIRE CLASS ####
+####################
+
+# the heart of this solution: a Wire class
+# a wire is kept as a few numpy arrays, rather than one object per position:
+#   xs, ys    : the positions, starting from (0, 0), one more than there are moves
+#   steps     : the number of steps the wire takes to get to each position, i.e. a prefix sum of the amounts
+# and, for segment i, from position i to position i+1:
+#   vertical  : whether the segment is vertical; a move of 0 counts as vertical, and never crosses anything
+#   fixed     : the coordinate that doesn't change along it, x if vertical, y if horizontal
+#   lo, hi    : the range of the coordinate that does change
+# so a segment is 6 int64s and a bool, and nothing is allocated per pair of segments
+
+# the displacement of one step in each direction, indexed by the character code
+DX = np.zeros(256, dtype=np.int64)
+DY = np.zeros(256, dtype=np.int64)
+DX[ord('L')], DX[ord('R')] = -1, 1
+DY[ord('D')], DY[ord('U')] = -1, 1
+
+class Wire():
+    # initialize with the directions of the moves as a string or bytes, e.g. 'RDR', and the amounts, e.g. [75, 30, 83]
+    def __init__(self, directions, amounts):
+        if isinstance(directions, str):
+            directions = directions.encode()
+        codes   = np.frombuffer(directions, dtype=np.uint8)
+        amounts = np.asarray(amounts, dtype=np.int64)
+        if len(codes) != len(amounts):
+            raise Exception(f'Wire has {len(codes)} directions but {len(amounts)} amounts')
+        if np.any((DX[codes] == 0) & (DY[codes] == 0)):
+            raise Exception('Wire directions must be L, R, D, or U')
+
+        self.xs    = np.concatenate(([0], np.cumsum(DX[codes] * amounts)))
+        self.ys    = np.concatenate(([0], np.cumsum(DY[codes] * amounts)))
+        self.steps = np.concatenate(([0], np.cumsum(amounts)))
+
+        self.vertical = self.xs[:-1] == self.xs[1:]
+        self.fixed    = np.where(self.vertical, self.xs[:-1], self.ys[:-1])
+        start         = np.where(self.vertical, self.ys[:-1], self.xs[:-1])
+        end           = np.where(self.vertical, self.ys[1: ], self.xs[1: ])
+        self.lo       = np.minimum(start, end)
+        self.hi       = np.maximum(start, end)
+
+        # the segments indexed by their fixed coordinate, see makeIndex; only built once they're needed
+        self.rows    = None
+        self.columns = None
+
+    # make a wire from a list of moves of the form [LRDU]\d+
+    @staticmethod
+    def fromMoves(moves):
+        return Wire(''.join(move[0] for move in moves), [int(move[1:]) for move in moves])
+
+    # the number of segments
+    def __len__(self):
+        return len(self.vertical)
+
+    # compute the number of grid points the wire passes through to get to (x, y) FIRST
+    # i.e. find the first segment that passes through (x, y), in its row or in its column,
+    # then it's the steps up until that segment plus the extra steps along it
+    # None if the wire never passes through (x, y) (other than at a corner)
+    def nStepsTillPos(self, x, y):
+        if self.rows is None:
+            self.rows    = makeIndex(self, ~self.vertical)
+            self.columns = makeIndex(self,  self.vertical)
+
+        candidates = []
+        if x in self.columns:
+            candidates.append(self.columns[x].first(y))
+        if y in self.rows:
+            candidates.append(self.rows[y].first(x))
+        candidates = [i for i in candidates if i is not None]
+        if not candidates:
+            return None
+        i = min(candidates)
+        return int(self.steps[i]) + abs(x - int(self.xs[i])) + abs(y - int(self.ys[i]))
+
+# index the segments of a wire picked out by mask by their fixed coordinate
+# e.g. the vertical ones by x, so that all the segments along one line are in one StabIndex
+def makeIndex(wire, mask):
+    indices = np.flatnonzero(mask)
+    indices = indices[np.argsort(wire.fixed[indices], kind='stable')]
+    lines, starts = np.unique(wire.fixed[indices], return_index=True)
+    return {
+        fixed: StabIndex(wire.lo[line].tolist(), wire.hi[line].tolist(), line.tolist())
+        for fixed, line in zip(lines.tolist(), np.split(indices, starts[1:]))
+    }
+
+# the segments of a wire along one line, e.g. the vertical segments at some x,
+# for finding the first segment strictly containing a point in O(log n), even if they overlap
+# the ends of the segments cut the line into breakpoints and the open intervals between them;
+# firsts[2k] is the first segment containing breakpoint k, firsts[2k+1] the first segment
+# containing the interval between breakpoints k and k+1, or None if there isn't one
+# a move of 0 contains nothing, so it's left out
+class StabIndex():
+    # initialize with the lo, hi, and index of every segment
+    def __init__(self, los, his, indices):
+        segments = sorted((lo, hi, i) for lo, hi, i in zip(los, his, indices) if lo < hi)
+        self.breakpoints = sorted(set(los) | set(his))
+        self.firsts = []
+
+        # sweep along the line, keeping the segments seen so far in a heap by index
+        # segments that have ended are only thrown out once they get to the top
+        active, s = [], 0
+        for point in self.breakpoints:
+            while active and active[0][1] <= point:
+                heapq.heappop(active)
+            self.firsts.append(active[0][0] if active else None)
+            while s < len(segments) and segments[s][0] == point:
+                lo, hi, i = segments[s]
+                heapq.heappush(active, (i, hi))
+                s += 1
+            self.firsts.append(active[0][0] if active else None)
+
+    # the first segment strictly containing c, or None
+    def first(self, c):
+        k = bisect.bisect_left(self.breakpoints, c)
+        if k < len(self.breakpoints) and self.breakpoints[k] == c:
+            return self.firsts[2*k]
+        if k == 0:
+            return None
+        return self.firsts[2*k-1]
 
 ###################
-#### FUNCTIONS ####
+#### CROSSINGS ####
 ###################
 
-# functions that operate on multiple positions or require context
-
-# abstracts away checking whether things are LRDU etc.
-# an x coordinate lies between 2 points on a wire if it is between the min of the x's and the max of the x's
-# same for y
-def checkIfPosBetween(pos1, pos2, pos, coord):
-    return min(getattr(pos1, coord), getattr(pos2, coord)) < getattr(pos, coord) < max(getattr(pos1, coord), getattr(pos2, coord))
-
-# given segment of wire 1 (pos11 to pos12) and of wire 2 (pos21 to pos22)
-# compute the displacement vectors (so recovering the LRDU code)
-# if they're orthogonal, find the coordinates in common for each of two cases
-# return the position if it all works out; otherwise False
-def checkIfCross(pos11, pos12, pos21, pos22):
-    disp1 = pos11.displacement(pos12)
-    disp2 = pos21.displacement(pos22)
-
-    if disp1.isOrthogonal(disp2):
-        if disp1.lastDir in 'LR': 
-            if checkIfPosBetween(pos11, pos12, pos21, 'x') and \
-               checkIfPosBetween(pos21, pos22, pos11, 'y'):
-                return Position(pos21.x, pos11.y, None, 0)
-            return False
-        if disp1.lastDir in 'UD':
-            if checkIfPosBetween(pos11, pos12, pos21, 'y') and \
-               checkIfPosBetween(pos21, pos22, pos11, 'x'):
-                return Position(pos11.x, pos21.y, None, 0)
-            return False
-
-    return False
-
-# given a wire segment list and a pos, compute the number of grid points
-# the wire passes through to get to that position FIRST
-# i.e. loop over all the segments from the beginning again, check for the common coordinate,
-# compute the number of steps up until that position (including the current amount),
-# then add on the displacement -- extra steps for the LAST segment under consideration
-def nStepsTillPos(wires, pos):
-    for i in range(len(wires)-1):
-        pos1, pos2 = wires[i], wires[i+1]
-        steps = sum([w.amount for w in wires[:i+1]])
-        if pos1.x == pos2.x and pos1.x == pos.x and checkIfPosBetween(pos1, pos2, pos, 'y'):
-            return steps + pos1.displacement(pos).manhattan()
-        if pos1.y == pos2.y and pos1.y == pos.y and checkIfPosBetween(pos1, pos2, pos, 'x'):
-            return steps + pos1.displacement(pos).manhattan()
-    return None
+# every crossing between two wires, as arrays (x, y, i, j),
+# where i is the index of the segment of wire 1 and j of the segment of wire 2
+# a crossing is strictly inside both segments: touching at a corner, or running along each other, doesn't count
+# small pairs of wires are done by brute force, a block at a time; big ones with a sweep line
+BRUTEFORCE = 1 << 16
+
+def findCrossings(wire1, wire2):
+    if len(wire1) * len(wire2) <= BRUTEFORCE:
+        blocks = [crossBlock(wire1, wire2, start, start + BLOCKSIZE) for start in range(0, len(wire1), BLOCKSIZE)]
+    else:
+        blocks = [sweep(wire1, wire2), sweep(wire2, wire1)[[0, 1, 3, 2]]]
+    if not blocks:
+        return np.zeros((4, 0), dtype=np.int64)
+    return np.concatenate(blocks, axis=1)
+
+####################
+#### BRUTEFORCE ####
+####################
+
+# test a block of segments of wire 1 against every segment of wire 2 at once, with broadcasting
+# a vertical segment and a horizontal segment cross if each one's fixed coordinate is strictly
+# inside the other's range; the block is kept small so that the (block, wire 2) arrays stay small
+BLOCKSIZE = 256
+
+def crossBlock(wire1, wire2, start, stop):
+    block = slice(start, stop)
+    cross = (wire1.vertical[block, None] != wire2.vertical[None, :]) & \
+            (wire1.lo   [block, None] < wire2.fixed[None, :]) & \
+            (wire2.fixed[None, :]     < wire1.hi   [block, None]) & \
+            (wire2.lo   [None, :]     < wire1.fixed[block, None]) & \
+            (wire1.fixed[block, None] < wire2.hi   [None, :])
+    i, j = np.nonzero(cross)
+    i += start
+    x = np.where(wire1.vertical[i], wire1.fixed[i], wire2.fixed[j])
+    y = np.where(wire1.vertical[i], wire2.fixed[j], wire1.fixed[i])
+    return np.array([x, y, i, j], dtype=np.int64).reshape(4, -1)
+
+####################
+#### SWEEP LINE ####
+####################
+
+# find every crossing between two wires without looking at every pair of segments
+# a crossing is always a horizontal segment of one wire against a vertical segment of the other,
+# so sweep from left to right:
+# a horizontal segment is active while the sweep is strictly between its ends, and
+# a vertical segment at x crosses every active horizontal segment strictly between its ends in y
+# the horizontal segments are ranked by y up front, so the ones a vertical segment could cross
+# are a range of ranks, and the active ones are found in an ActiveSet over the ranks
+# this is O((n+m) log n + k log n) for k crossings, instead of O(n*m)
+
+# order of the events at the same x: ends strictly before x are gone, starts at x aren't there yet
+END, QUERY, START = 0, 1, 2
+
+# every crossing of the horizontal segments of wire 1 with the vertical segments of wire 2, as arrays (x, y, i, j)
+def sweep(wire1, wire2):
+    horizontal = np.flatnonzero(~wire1.vertical)
+    vertical   = np.flatnonzero( wire2.vertical)
+
+    # rank the horizontal segments by (y, index); ranks[k] is the rank of horizontal[k]
+    byY   = horizontal[np.lexsort((horizontal, wire1.fixed[horizontal]))]
+    ys    = wire1.fixed[byY].tolist()
+    ranks = np.empty(len(horizontal), dtype=np.int64)
+    ranks[np.searchsorted(horizontal, byY)] = np.arange(len(horizontal))
+
+    # every event is (x, kind, payload); a horizontal segment starts at lo and ends at hi,
+    # and its payload is its rank; a vertical segment's payload is its index
+    xs       = np.concatenate((wire1.lo[horizontal], wire1.hi[horizontal], wire2.fixed[vertical]))
+    kinds    = np.repeat([START, END, QUERY], [len(horizontal), len(horizontal), len(vertical)])
+    payloads = np.concatenate((ranks, ranks, vertical))
+    order    = np.lexsort((kinds, xs))
+
+    byY      = byY.tolist()
+    lo2, hi2 = wire2.lo.tolist(), wire2.hi.tolist()
+
+    active    = ActiveSet(len(horizontal))
+    crossings = []
+    for x, kind, payload in zip(xs[order].tolist(), kinds[order].tolist(), payloads[order].tolist()):
+        if kind == START:
+            active.add(payload, 1)
+        elif kind == END:
+            active.add(payload, -1)
+        else:
+            lo = bisect.bisect_right(ys, lo2[payload])
+            hi = bisect.bisect_left (ys, hi2[payload])
+            for rank in active.ranks(lo, hi):
+                crossings.append((x, ys[rank], byY[rank], payload))
+    return np.array(crossings, dtype=np.int64).reshape(-1, 4).T
+
+# which of the ranks 0 to n-1 are active, as a Fenwick tree of counts,
+# so that adding or removing a rank, counting the active ranks below one,
+# and finding the k-th active rank are all O(log n)
+class ActiveSet():
+    def __init__(self, n):
+        self.n    = n
+        self.tree = [0] * (n+1)
+        self.top  = 1 << n.bit_length() >> 1
+
+    # add delta (1 or -1) to the count of rank
+    def add(self, rank, delta):
+        tree, n = self.tree, self.n
+        i = rank + 1
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    # the number of active ranks below rank
+    def count(self, rank):
+        tree  = self.tree
+        total = 0
+        while rank > 0:
+            total += tree[rank]
+            rank  -= rank & -rank
+        return total
+
+    # the k-th active rank, counting from 1
+    def find(self, k):
+        tree, n = self.tree, self.n
+        rank, step = 0, self.top
+        while step:
+            if rank + step <= n and tree[rank + step] < k:
+                rank += step
+                k    -= tree[rank]
+            step >>= 1
+        return rank
+
+    # every active rank from lo up to (but not including) hi, in order
+    def ranks(self, lo, hi):
+        if lo >= hi:
+            return []
+        return [self.find(k) for k in range(self.count(lo) + 1, self.count(hi) + 1)]
+
+####################
+#### READ WIRES ####
+####################
+
+# read wires, one per line of moves, from a binary stream, yielding each one as soon as its line ends
+# the stream is read a chunk at a time, and each piece of a line in a chunk is scanned for moves
+# with a regular expression, so a line is never held as one big string, let alone split into moves
+# a move cut off at the end of a chunk is carried over to the next one
+MOVE      = re.compile(rb'([LRDU])(\d+)')
+CHUNKSIZE = 1 << 20
+
+def readWires(f, chunkSize=CHUNKSIZE):
+    directions, amounts, carry = bytearray(), array('q'), b''
+    while True:
+        chunk = f.read(chunkSize)
+        data  = carry + chunk
+        if chunk:
+            cut = max(data.rfind(b','), data.rfind(b'\n')) + 1
+            data, carry = data[:cut], data[cut:]
+
+        # every newline in the chunk ends a wire
+        for k, piece in enumerate(data.split(b'\n')):
+            if k > 0 and directions:
+                yield Wire(bytes(directions), amounts)
+                directions, amounts = bytearray(), array('q')
+            moves = MOVE.findall(piece)
+            directions += b''.join(direction for direction, amount in moves)
+            amounts.extend(map(int, [amount for direction, amount in moves]))
+
+        if not chunk:
+            if directions:
+                yield Wire(bytes(directions), amounts)
+            return
+
+##################
+#### ANALYSIS ####
+##################
+
+# the closest crossing of two wires by Manhattan distance, and the one with the least delay
+# (inf for both if they don't cross)
+def bestCrossings(wire1, wire2):
+    xs, ys, i, j = findCrossings(wire1, wire2)
+
+    minDist = float('inf')
+    if len(xs) > 0:
+        minDist = int(np.min(np.abs(xs) + np.abs(ys)))
+
+    # use the FIRST time each wire passes through the crossing, see nStepsTillPos
+    minDelay = float('inf')
+    for x, y in zip(xs.tolist(), ys.tolist()):
+        candidateDelay = wire1.nStepsTillPos(x, y) + wire2.nStepsTillPos(x, y)
+        if candidateDelay < minDelay:
+            minDelay = candidateDelay
+
+    return minDist, minDelay
+
+# every pair of wires is analyzed separately, spread over a pool of worker processes
+# each worker is sent the wires once, when it starts, and keeps them in this global
+# after that, only the indices of the pairs (and the results) travel between processes
+workerWires = None
+
+def initWorker(wires):
+    global workerWires
+    workerWires = wires
+
+# analyze one pair of wires in a worker
+def evaluatePair(pair):
+    a, b = pair
+    return pair, bestCrossings(workerWires[a], workerWires[b])
+
+# analyze every pair of wires, across processes
+# return a dictionary of (a, b): (minDist, minDelay), with a < b indices into wires
+# a single pair isn't worth starting processes for, so it's done right here
+def analyzeWires(wires, processes=None):
+    pairs     = list(itertools.combinations(range(len(wires)), 2))
+    processes = processes or multiprocessing.cpu_count()
+    chunksize = max(1, len(pairs) // (4 * processes))
+
+    if len(pairs) <= 1 or processes == 1:
+        initWorker(wires)
+        return dict(map(evaluatePair, pairs))
+
+    with multiprocessing.Pool(processes, initializer=initWorker, initargs=(wires,)) as pool:
+        return dict(pool.imap_unordered(evaluatePair, pairs, chunksize))
 
 ##############
 #### MAIN ####
 ##############
 
-wire_dirs = {}
-
-# test cases
-#wire_dirs[1] = ['R8','U5','L5','D3']
-#wire_dirs[2] = ['U7','R6','D4','L4']
-#wire_dirs[1] = ['R75','D30','R83','U83','L12','D49','R71','U7','L72']
-#wire_dirs[2] = ['U62','R66','U55','R34','D71','R55','D58','R83']
-
-# i+1 because I call it wire 1 and 2
-# strip the newline and split on , to get a list of direction/amounts
-with open('input3.txt') as f:
-    for i, line in enumerate(f):
-        wire_dirs[i+1] = line.strip('\n').split(',')
-
-# prepare to compute positions instead of segments
-wire_pos = {}
-wire_pos[1] = [Position(0, 0, None, 0)]
-wire_pos[2] = [Position(0, 0, None, 0)]
-
-# hard work is now done by the class
-# segments are of the form [LRDU]\d+
-# so get the direction and the amount
-# get the previous position
-# increment by the direction and amount
-# tack on the new position
-for wire in (1, 2):
-    for move in wire_dirs[wire]:
-        direction = move[0]
-        amount = int(move[1:])
-
-        currentPos = wire_pos[wire][-1]
-        newPos = currentPos.increment(direction, amount)
-        wire_pos[wire].append(newPos)
-
-
-################
-#### PART 1 ####
-################
-
-# for each position in wire 1, look at it + the next one
-# for each position in wire 2, look at it + the next one
-# compute a possible crossing -- it's either None or a Position
-# if it's Position, update minDist if the Manhattan distance of the crossing is smaller than the current min
-minDist = float('inf')
-
-# loop over pairs
-for i in range(len(wire_pos[1])-1):
-    pos11, pos12 = wire_pos[1][i], wire_pos[1][i+1]
-    for j in range(len(wire_pos[2])-1):
-        pos21, pos22 = wire_pos[2][j], wire_pos[2][j+1]
-
-        # compute crossing
-        possibleCross = checkIfCross(pos11, pos12, pos21, pos22)
-        if possibleCross:
-
-            #print(pos11, 'to', pos12, 'crosses', pos21, pos22, 'at', possibleCross, ':', possibleCross.manhattan())
-
-            # update
-            if possibleCross.manhattan() < minDist:
-                minDist = possibleCross.manhattan()
-
-print('Part 1:', minDist)
-
-################
-#### PART 2 ####
-################
-
-# the tricky part here is "use the FIRST time the wire passes through the grid point to compute the number of steps"
-# so this is a slow solution. again, compute a possible intersection
-# then, compute the number of steps for each wire separately, stopping at the FIRST one
-# then add them together, etc.
-minDelay = float('inf')
-
-# loop over pairs
-for i in range(len(wire_pos[1])-1):
-    pos11, pos12 = wire_pos[1][i], wire_pos[1][i+1]
-    for j in range(len(wire_pos[2])-1):
-        pos21, pos22 = wire_pos[2][j], wire_pos[2][j+1]
-
-        # compute crossing
-        possibleCross = checkIfCross(pos11, pos12, pos21, pos22)
-        if possibleCross:
-
-            # compute nSteps
-            wire1Steps = nStepsTillPos(wire_pos[1], possibleCross)
-            wire2Steps = nStepsTillPos(wire_pos[2], possibleCross)
-            candidateDelay = wire1Steps + wire2Steps
-
-            # update
-            if candidateDelay < minDelay:
-                minDelay = candidateDelay
-
-print('Part 2:', minDelay)
+if __name__ == '__main__':
+
+    # test cases, as the lines of input3.txt
+    # R8,U5,L5,D3
+    # U7,R6,D4,L4
+    # R75,D30,R83,U83,L12,D49,R71,U7,L72
+    # U62,R66,U55,R34,D71,R55,D58,R83
+
+    # one wire per line; the puzzle has two, but any number of them works
+    with open('input3.txt', 'rb') as f:
+        wires = list(readWires(f))
+
+    # every crossing of every pair of wires, each pair in one pass for both parts
+    results = analyzeWires(wires)
+
+    # with more than two wires, report the best of each pair as well
+    if len(wires) > 2:
+        for (a, b), (minDist, minDelay) in sorted(results.items()):
+            print('Wires {} and {}: distance {}, delay {}'.format(a+1, b+1, minDist, minDelay))
+
+    ################
+    #### PART 1 ####
+    ################
+
+    # the closest crossing, by Manhattan distance, of any pair
+    print('Part 1:', min([minDist for minDist, minDelay in results.values()], default=float('inf')))
+
+    ################
+    #### PART 2 ####
+    ################
+
+    # the crossing with the least delay, of any pair
+    print('Part 2:', min([minDelay for minDist, minDelay in results.values()], default=float('inf')))
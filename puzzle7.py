@@ -1,268 +1,179 @@
+import asyncio
+import functools
 import itertools
+import math
+import multiprocessing
 
-##########################
-#### INTCODE COMPUTER ####
-##########################
+from intcode import AmplifierNetwork, IntcodeComputer, VMPool, loadProgram, runPipeline
 
+# every amplifier starts the same way: it reads its phase setting, then waits for a signal
+# so that part only has to be run once per phase; after that, amplifiers come from a VMPool
+# for that phase, and go back to it when they are done, to be reset and reused
+# memory is typed, so every fork shares (and copies) compact pages rather than lists of ints
 # run as follows:
-#   computer = IntcodeComputer(code)
+#   bank = AmplifierBank(program)
+#   computer = bank.amplifier(phase)
+#   computer.addInput(signal)
 #   computer.run()
-#
-# for programmatic inputs,
-#   computer = IntcodeComputer(code, inputs=[1, 2, ...])
-# or
-#   computer = IntcodeComputer(code)
-#   computer.setInputs([1, 2, ...])
-# before running
-#
-# for programmatic outputs,
-#   computer = IntcodeComputer(code, storeOutputs=True)
-# or
-#   computer = IntcodeComputer(code)
-#   computer.setStoreOutputs()
-
-class IntcodeComputer():
-
-    NPARAM = {1:3, 2:3, 3:1, 4:1, 5:2, 6:2, 7:3, 8:3, 99:0}
-
-    # initialize with the program to be run
-    def __init__(self, intcode, inputs=None, storeOutputs=False):
-        self.intcode = intcode[:]
-        self.pointer = 0
-        self.halt    = False
-        self.wait    = False
-
-        self.setInputs(inputs)
-        self.setStoreOutputs(storeOutputs)
-
-    # wrapper for setting inputs
-    def setInputs(self, inputs):
-        if inputs is not None:
-            self.inputs = list(reversed(inputs))
-        else:
-            self.inputs = None
-
-    # wrapper for programmatically adding inputs
-    # inputs are consumed by popping off a stack, so
-    # adding inputs must be done by adding to the front
-    def addInput(self, code):
-        if self.inputs is not None:
-            self.inputs.insert(0, code)
-
-    # wrapper for storing outputs
-    def setStoreOutputs(self, flag=True):
-        self.storeOutputs = flag
-        if self.storeOutputs:
-            self.outputs = []
-
-    # for debugging purposes
-    # print the current pointer, the halt and wait booleans, the inputs and outputs
-    # inputs should be represented in reverse order so that inputs can be popped on and off
-    def inspectState(self):
-        print('Pointer: {:3d} Halt: {:5s} Wait: {:5s} Inputs: {} Outputs: {}'.format(
-            self.pointer,
-            str(self.halt),
-            str(self.wait),
-            self.inputs,
-            self.outputs,
-        ))
-
-    # run the computer from pointer 0 with the stored program
-    # the WAIT boolean PAUSES execution if there are not enough inputs
-    # the only time WAIT is currently True is if there is a pending input
-    # so assert that there's at least one input before resetting WAIT and continuing
-    def run(self):
-        if self.wait:
-            assert(len(self.inputs) > 0)
-            self.wait = False
-        while not self.halt and not self.wait:
-            self.compute()
-
-    # implementation of parameter modes
-    # don't use for write positions (implicitly mode 0, nothing to get)
-    # mode 0: position mode
-    # mode 1: immediate mode
-    def getValue(self, p, mode):
-        if mode == 0:
-            return self.intcode[p]
-        if mode == 1:
-            return p
-        raise Exception('Unknown parameter mode {}'.format(mode))
-
-    # given a pointer, cut up the opcode and get the modes
-    # Suppose the opcode is 01102: this is opcode 2, with the params in mode 1 1 0
-    # so get 110 by doing 01102 // 100 ( = 11), right justifying with 0s ( = 011), and reversing
-    def getModes(self, p):
-        opcode   = self.intcode[p] % 100
-        if opcode not in IntcodeComputer.NPARAM:
-            raise Exception('{} is not a valid op code'.format(opcode))
-        parcodes = str(self.intcode[p] // 100).rjust(IntcodeComputer.NPARAM[opcode], '0')
-        modes    = list( reversed([ int(i) for i in parcodes ]) )
-        return modes
-
-    # main computer
-    # processes the intcode at the current pointer
-    def compute(self):
-
-        p = self.pointer
-
-        # opcode is the last two digits of intcode[p]
-        # modes are the parameter modes, in the correct order (and of the correct length of parameters)
-        # parameters are just intcode[p+1] through intcode[p+1 + nParams]
-        # newp is where the pointer should move to; this is usually p + nParams + 1
-
-        opcode = self.intcode[p] % 100
-        modes  = self.getModes(p)
-        params = self.intcode[p + 1 : p + IntcodeComputer.NPARAM[opcode] + 1]
-        newp   = p + IntcodeComputer.NPARAM[opcode] + 1
-
-        # add
-        if   opcode == 1:
-            x, y, o = params
-            self.intcode[o] = self.getValue(x, modes[0]) + self.getValue(y, modes[1])
-
-        # multiply
-        elif opcode == 2:
-            x, y, o = params
-            self.intcode[o] = self.getValue(x, modes[0]) * self.getValue(y, modes[1])
-
-        # input
-        elif opcode == 3:
-            o = params[0]
-
-            # get input from the command line if inputs is None
-            if self.inputs is None:
-                i = input('Provide input: ')
-
-            # get input by popping off the inputs list if it exists
-            else:
-
-                # consume the next available input
-                if len(self.inputs) > 0:
-                    i = self.inputs.pop()
-
-                # if there aren't any, pause execution
-                # the run loop will break when this wait boolean is True
-                # immediately end the computation
-                # the next time run is called, wait will be reset to False
-                # no pointers have changed, no modifications were made
-                # so execution will resume from where it last left off
-                else:
-                    self.wait = True
-                    return
-
-            self.intcode[o] = int(i)
-
-        # output
-        elif opcode == 4:
-            x = params[0]
-
-            # print output or store the outputs
-            value = self.getValue(x, modes[0])
-            if not self.storeOutputs:
-                print(value)
-            else:
-                self.outputs.append(value)
-
-        # jump if true
-        elif opcode == 5:
-            t, v = params
-            if self.getValue(t, modes[0]) != 0:
-                newp = self.getValue(v, modes[1])
-
-        # jump if false
-        elif opcode == 6:
-            t, v = params
-            if self.getValue(t, modes[0]) == 0:
-                newp = self.getValue(v, modes[1])
-
-        # less than
-        elif opcode == 7:
-            a, b, o = params
-            if self.getValue(a, modes[0]) < self.getValue(b, modes[1]):
-                self.intcode[o] = 1
-            else:
-                self.intcode[o] = 0
-
-        # equal to
-        elif opcode == 8:
-            a, b, o = params
-            if self.getValue(a, modes[0]) == self.getValue(b, modes[1]):
-                self.intcode[o] = 1
-            else:
-                self.intcode[o] = 0
-
-        # halt
-        elif opcode == 99:
-            self.pointer = newp
-            self.halt    = True
-            return
-
-        # error
-        else:
-            raise Exception('{} is not a valid op code'.format(opcode))
-
-        self.pointer = newp
-        self.halt    = False
-
-
-####
-
-master = None
-with open('input7.txt') as f:
-    for line in f:
-        master = list(map(int, line.strip('\n').split(',')))
-
-# part 1
-# try every phase setting
+#   bank.release(phase, computer)
+class AmplifierBank():
+
+    def __init__(self, program):
+        self.program = program
+        self.pools   = {}
+
+    # an amplifier that has already consumed its phase setting
+    def amplifier(self, phase):
+        if phase not in self.pools:
+            computer = IntcodeComputer(self.program, inputs=[phase], storeOutputs=True, typed=True)
+            computer.run()
+            self.pools[phase] = VMPool(computer)
+        return self.pools[phase].acquire()
+
+    # give an amplifier back, once it is done
+    def release(self, phase, computer):
+        self.pools[phase].release(computer)
+
+# run the amplifiers in series: try a phase setting
 # initialize an input
 # loop over the amplifiers
-# inputs are the phase setting and the ampInput
+# get an amplifier for the phase setting, and give it the ampInput
 # run the computer, store the output into ampInput for the next round
-# update the max
-
-maxOutput = 0
-for phaseSettings in itertools.permutations(range(5)):
+def runChain(bank, phaseSettings):
     ampInput = 0
-    for amplifier in range(5):
-        computer = IntcodeComputer(master, inputs=[phaseSettings[amplifier], ampInput], storeOutputs=True)
+    for phase in phaseSettings:
+        computer = bank.amplifier(phase)
+        computer.addInput(ampInput)
         computer.run()
         ampInput = computer.outputs.pop()
+        bank.release(phase, computer)
+    return ampInput
+
+# run the amplifiers in a feedback loop: try a phase setting
+# get one amplifier per phase setting
+# wire them into a ring on an AmplifierNetwork, and feed 0 to the first
+# every amplifier then runs whenever the previous one has given it a signal
+# the answer is the last signal out of the last amplifier, once they have all halted
+def runFeedbackLoop(bank, phaseSettings):
+    network = AmplifierNetwork()
+    nAmps   = len(phaseSettings)
+    for amplifier, phase in enumerate(phaseSettings):
+        network.addNode(amplifier, bank.amplifier(phase))
+    for amplifier in range(nAmps):
+        network.connect(amplifier, (amplifier+1) % nAmps)
+
+    network.feed(0, 0)
+    outputs = network.sink(nAmps-1)
+    asyncio.run(network.run())
+
+    for amplifier, phase in enumerate(phaseSettings):
+        bank.release(phase, network.computers[amplifier])
+    return outputs[-1]
+
+# same as runFeedbackLoop, but with every amplifier in its own process, see runPipeline
+# starting the processes costs far more than the puzzle input's amplifiers ever run for,
+# so this is for programs that do a lot of work per signal
+def runFeedbackPipeline(program, phaseSettings):
+    return runPipeline(program, [[phase] for phase in phaseSettings], feedback=True)
+
+
+#####################
+#### SEARCH TREE ####
+#####################
+
+# for amplifiers in series, try every ordering of nAmps of the given phases as a tree:
+# the root is the initial signal 0, every node below it picks the phase of the next amplifier,
+# and the signal at a node is the output of that amplifier; the leaves are the permutations
+# a depth first walk runs every amplifier once per node, so permutations sharing a prefix share
+# its runs, instead of running all nAmps amplifiers for every permutation
+# on top of that, an amplifier's output only depends on its phase and its input signal, since
+# they all run the same program, so runs are cached by (phase, signal), which also merges
+# equal signals on different branches; the cache is LRU, to bound the memory of long chains
+# return the max output and the phase settings that produced it, like searchPhases
+# ties go to the first phase settings in lexicographic order, as they are visited first
+def searchChain(bank, phases, nAmps=None, cacheSize=4096):
+    phases = tuple(sorted(phases))
+    nAmps  = len(phases) if nAmps is None else nAmps
+
+    @functools.lru_cache(maxsize=cacheSize)
+    def amplify(phase, signal):
+        computer = bank.amplifier(phase)
+        computer.addInput(signal)
+        computer.run()
+        output = computer.outputs.pop()
+        bank.release(phase, computer)
+        return output
+
+    # best (output, phases) below a node, given its signal and the phases still unused
+    def walk(signal, remaining, depth):
+        if depth == nAmps:
+            return signal, ()
+        best = None
+        for i, phase in enumerate(remaining):
+            output, rest = walk(amplify(phase, signal), remaining[:i] + remaining[i+1:], depth+1)
+            if best is None or output > best[0]:
+                best = output, (phase,) + rest
+        return best
+
+    return walk(0, phases, 0)
+
+
+#########################
+#### PARALLEL SEARCH ####
+#########################
+
+# the search over phase settings is spread over a pool of worker processes
+# each worker is sent the program once, when it starts, and keeps a bank of it in these globals
+# after that, only the phase settings (and the results) travel between processes
+workerBank     = None
+workerFeedback = False
+
+def initWorker(program, feedback):
+    global workerBank, workerFeedback
+    workerBank     = AmplifierBank(program)
+    workerFeedback = feedback
+
+# evaluate one phase setting in a worker
+def evaluatePhases(phaseSettings):
+    if workerFeedback:
+        return runFeedbackLoop(workerBank, phaseSettings), phaseSettings
+    return runChain(workerBank, phaseSettings), phaseSettings
+
+# try every ordering of nAmps of the given phases, across processes, and
+# return the max output and the phase settings that produced it
+# nAmps defaults to using every phase, i.e. one amplifier per phase
+# permutations are handed out in chunks, so that there are a few chunks per process;
+# with many amplifiers there are far too many permutations to send one at a time
+# ties go to the first phase settings in lexicographic order, so that the answer doesn't
+# depend on which worker happens to finish first
+def searchPhases(program, phases, nAmps=None, feedback=False, processes=None):
+    phases    = tuple(phases)
+    nAmps     = len(phases) if nAmps is None else nAmps
+    processes = processes or multiprocessing.cpu_count()
+    chunksize = max(1, math.perm(len(phases), nAmps) // (4 * processes))
+
+    maxOutput, maxPhases = None, None
+    with multiprocessing.Pool(processes, initializer=initWorker, initargs=(program, feedback)) as pool:
+        results = pool.imap_unordered(evaluatePhases, itertools.permutations(phases, nAmps), chunksize)
+        for output, phaseSettings in results:
+            if maxOutput is None or output > maxOutput or (output == maxOutput and phaseSettings < maxPhases):
+                maxOutput, maxPhases = output, phaseSettings
+
+    return maxOutput, maxPhases
 
-    currentOutput = ampInput
-    if currentOutput > maxOutput:
-        maxOutput = currentOutput
-
-print('Part 1:', maxOutput)
-
-# part 2
-# try every phase setting
-# initialize 5 computers
-# initially, all inputs are just the phase settings
-# initialize an input
-# start an infinite loop
-# add the previous input into the list of inputs
-# run the computer
-# it will either halt (99) or wait
-# for this problem, either halt or wait SHOULD guarantee an output
-# store the output into the next input
-# rest of the logic is the same as above
 
-maxOutput = 0
-for phaseSettings in itertools.permutations(range(5, 10)):
+####
 
-    computers = [IntcodeComputer(master, inputs=[phaseSettings[i]], storeOutputs=True) for i in range(5)]
+if __name__ == '__main__':
 
-    ampInput = 0
-    for amplifier in itertools.cycle(range(5)):
-        computers[amplifier].addInput(ampInput)
-        computers[amplifier].run()
-        ampInput = computers[amplifier].outputs.pop()
-        if amplifier == 4 and computers[amplifier].halt:
-            break
+    master = loadProgram('input7.txt')
 
-    currentOutput = ampInput
-    if currentOutput > maxOutput:
-        maxOutput = currentOutput
+    # part 1
+    # try every phase setting, with the amplifiers in series
+    maxOutput, maxPhases = searchChain(AmplifierBank(master), range(5))
+    print('Part 1:', maxOutput)
 
-print('Part 2:', maxOutput)
+    # part 2
+    # try every phase setting, with the amplifiers in a feedback loop
+    maxOutput, maxPhases = searchPhases(master, range(5, 10), feedback=True)
+    print('Part 2:', maxOutput)
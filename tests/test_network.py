@@ -0,0 +1,35 @@
+import asyncio
+
+from intcode import AmplifierNetwork, IntcodeComputer
+
+# A sends far more outputs than fit in B's queue, but B reads one input and halts
+# the outputs left over have to be dropped, rather than blocking A forever
+def test_halted_target():
+    network = AmplifierNetwork(maxsize=16)
+    network.addNode('A', IntcodeComputer([104, 1] * 100 + [99], inputs=[], storeOutputs=True))
+    network.addNode('B', IntcodeComputer([3, 0, 4, 0, 99], inputs=[], storeOutputs=True))
+    network.connect('A', 'B')
+    outputsA = network.sink('A')
+    outputsB = network.sink('B')
+    asyncio.run(asyncio.wait_for(network.run(), timeout=5))
+    assert outputsA == [1] * 100
+    assert outputsB == [1]
+
+# A and B in a ring, each sending the other more than fits in a queue for every input it reads
+# each has to keep reading its own queue while it is blocked sending, or both block forever
+# each reads three inputs, echoing each one 20 times, and halts
+RING = [3, 100] + [4, 100] * 20 + [1001, 101, -1, 101, 1005, 101, 0, 99]
+RING = RING + [0] * (101 - len(RING)) + [3]
+
+def test_ring():
+    network = AmplifierNetwork(maxsize=16)
+    network.addNode('A', IntcodeComputer(RING, inputs=[], storeOutputs=True))
+    network.addNode('B', IntcodeComputer(RING, inputs=[], storeOutputs=True))
+    network.connect('A', 'B')
+    network.connect('B', 'A')
+    network.feed('A', 1)
+    outputsA = network.sink('A')
+    outputsB = network.sink('B')
+    asyncio.run(asyncio.wait_for(network.run(), timeout=5))
+    assert outputsA == [1] * 60
+    assert outputsB == [1] * 60
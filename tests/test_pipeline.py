@@ -0,0 +1,19 @@
+import pytest
+
+from intcode import runPipeline
+
+# every stage reads its phase, then sends five outputs and halts, never reading again
+# the outputs left over don't fit in the channels, and have to be dropped once the stage
+# they were sent to has halted, rather than blocking the stage sending them forever
+PROGRAM = [3, 100] + [104, 1] * 5 + [99]
+
+def test_halted_consumer_feedback():
+    assert runPipeline(PROGRAM, [[0], [0]], feedback=True, capacity=2, timeout=30) == 1
+
+def test_halted_consumer_chain():
+    assert runPipeline(PROGRAM, [[0], [0], [0]], capacity=2, timeout=30) == 1
+
+# a stage that never halts is stopped once the timeout runs out
+def test_timeout():
+    with pytest.raises(Exception, match='did not finish'):
+        runPipeline([3, 100, 1105, 1, 2], [[]], timeout=1)